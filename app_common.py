@@ -0,0 +1,42 @@
+import streamlit as st
+
+
+def setting(name, default):
+    """Value from .streamlit/secrets.toml; default without the entry or the file."""
+    try:
+        return st.secrets.get(name, default)
+    except FileNotFoundError:
+        return default  # no secrets.toml: the tabs run on their defaults
+
+
+# ============================================================
+# TAB INPUTS THAT SURVIVE A TAB SWITCH
+# ============================================================
+# app_main renders only the selected tab, and Streamlit drops the state of
+# every widget that was not rendered in a run. So each tab input is seeded
+# (value= / index=) from a plain session_state copy and saved back after
+# the widget returned. The widget needs a key: without one its identity
+# changes with value= and every other edit would be lost.
+#
+#   age = remember("elig_age", st.number_input("Age", value=remembered("elig_age", 32), key="elig_age"))
+
+_PREFIX = "saved_"
+
+
+def remembered(key, default):
+    """Last value of a tab input (default the first time)."""
+    return st.session_state.get(_PREFIX + key, default)
+
+
+def remember(key, value):
+    st.session_state[_PREFIX + key] = value
+    return value
+
+
+def remembered_index(key, options, default):
+    """index= for a selectbox / radio; default if the saved value is no longer an option."""
+    options = list(options)
+    value = remembered(key, default)
+    if value in options:
+        return options.index(value)
+    return options.index(default) if default in options else 0
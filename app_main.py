@@ -1,41 +1,24 @@
 # app_main.py
 import streamlit as st
 
-from app_tab1_eligibility import render_tab1
-from app_tab4_chatbot import render_tab4
-from app_tab5_official_info import render_tab5
-from app_tab6_learn_german import render_tab6
-from app_tab7_technical import render_tab7
-from app_tab8_quiz import render_tab8
+from tab_registry import TABS, render_tab
 
 st.set_page_config(page_title="Einbürgerung Helper", layout="wide")
 st.title("Einbürgerung – Demo App")
 
 
-tabs = st.tabs([
-    "Eligibility",
-    "Chatbot",
-    "Official info",
-    "Learn German",
-    "Quiz",
-    "Technical info",
-])
+# st.tabs() runs the body of every tab on each rerun, which would import
+# every tab module (pandas/OpenAI/Gemini/Supabase) for every visitor.
+# A horizontal radio renders only the selected tab, and tab_registry
+# imports that tab's module the first time it is shown.
+selected_tab = st.radio(
+    "Section",
+    list(TABS),
+    horizontal=True,
+    label_visibility="collapsed",
+    key="selected_tab",
+)
 
-with tabs[0]:
-    render_tab1()
-
-with tabs[1]:
-    render_tab4()
-
-with tabs[2]:
-    render_tab5()
-
-with tabs[3]:
-    render_tab6()
-
-with tabs[4]:
-    render_tab8()
-
-with tabs[5]:
-    render_tab7()
+st.markdown("---")
 
+render_tab(selected_tab)
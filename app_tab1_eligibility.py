@@ -1,35 +1,132 @@
 import streamlit as st
-from tensorflow.keras.models import load_model
-import pickle
-import pandas as pd
+
+from app_common import remember, remembered, remembered_index, setting
+from eligibility_bundle import BUNDLE_FILES, get_bundle
+from eligibility_explain import explain
+from eligibility_features import FIELD_LABELS
+from inference_batcher import DEFAULT_MAX_BATCH_SIZE, DEFAULT_WINDOW_MS, get_batcher
+from prediction_cache import get_prediction_cache
 
 # ============================================================
-# CACHED LOADERS (short & clean)
+# LOADER (short & clean)
 # ============================================================
 
-@st.cache_resource
-def load_ann_model():
-    return load_model("models/eligibility_ann.keras")
+def model_precision():
+    # ELIGIBILITY_MODEL_PRECISION in .streamlit/secrets.toml:
+    # "float32" (default), "float16" or "int8" (see quantize_eligibility_model.py)
+    precision = setting("ELIGIBILITY_MODEL_PRECISION", "float32")
+    return precision if precision in BUNDLE_FILES else "float32"
+
+
+def load_eligibility_bundle(precision="float32"):
+    # One mmapped file (see pack_eligibility_bundle.py): NumPy weights,
+    # scaler, encoder categories and feature order. Shared by every tab,
+    # session and worker process; no TensorFlow and no pickle at serve time.
+    # Reloaded automatically when the file on disk is replaced.
+    return get_bundle(BUNDLE_FILES[precision])
+
+
+def load_batcher(bundle):
+    # Single-row predictions from all sessions go through one worker that
+    # runs them as micro-batches (see inference_batcher.py).
+    # ELIGIBILITY_BATCH_WINDOW_MS / ELIGIBILITY_MAX_BATCH_SIZE in secrets.toml.
+    return get_batcher(
+        "eligibility",
+        bundle.version,
+        bundle.engine.predict,
+        window_ms=float(setting("ELIGIBILITY_BATCH_WINDOW_MS", DEFAULT_WINDOW_MS)),
+        max_batch_size=int(setting("ELIGIBILITY_MAX_BATCH_SIZE", DEFAULT_MAX_BATCH_SIZE)),
+    )
 
 
-@st.cache_resource
-def load_feature_columns():
-    # This should now only contain correct names,
-    # including "language_level_encoded"
-    with open("models/eligibility_feature_columns.pkl", "rb") as f:
-        feature_columns = pickle.load(f)
-    return feature_columns
+# ============================================================
+# WHAT-IF SWEEPS (one batched forward pass per sweep)
+# ============================================================
 
+THRESHOLD = 0.5
+
+# field -> (label, values to sweep) ; ranges match the input widgets below
+WHAT_IF_FIELDS = {
+    "monthly_income_eur": ("Monthly income (EUR)", list(range(0, 10001, 50))),
+    "years_in_germany": ("Years in Germany", list(range(0, 61))),
+    "language_level": ("Language level", ["A1", "A2", "B1", "B2", "C1", "C2"]),
+    "months_tax_paid_last_12": ("Months of tax paid in the last 12 months", list(range(0, 13))),
+    "age": ("Age", list(range(18, 101))),
+}
+
+
+def _flip_points(values, probs, threshold=THRESHOLD):
+    """
+    Values where the prediction crosses the threshold:
+    list of (value_before, value_after, now_eligible).
+    """
+    eligible = probs >= threshold
+    flips = []
+    for i in range(1, len(values)):
+        if eligible[i] != eligible[i - 1]:
+            flips.append((values[i - 1], values[i], bool(eligible[i])))
+    return flips
+
+
+def render_what_if(model, preprocessor, person):
+    with st.expander("What-if: change one field and see when the prediction flips"):
+        field = remember("what_if_field", st.selectbox(
+            "Field to vary",
+            list(WHAT_IF_FIELDS),
+            format_func=lambda f: WHAT_IF_FIELDS[f][0],
+            index=remembered_index("what_if_field", WHAT_IF_FIELDS, next(iter(WHAT_IF_FIELDS))),
+            key="what_if_field",
+        ))
+        label, values = WHAT_IF_FIELDS[field]
+
+        # all values in one batch, one forward pass
+        X_sweep = preprocessor.transform_sweep(person, field, values)
+        probs = model.predict(X_sweep)[:, 0]
+
+        st.line_chart(
+            {
+                label: values,
+                "Probability of being eligible": probs,
+                "Threshold": [THRESHOLD] * len(values),
+            },
+            x=label,
+            y=["Probability of being eligible", "Threshold"],
+        )
 
-@st.cache_resource
-def load_preprocessors():
-    with open("models/eligibility_scaler.pkl", "rb") as f:
-        scaler = pickle.load(f)
-    with open("models/eligibility_label_encoder.pkl", "rb") as f:
-        label_encoder = pickle.load(f)
-    with open("models/eligibility_onehot_encoder.pkl", "rb") as f:
-        onehot_encoder = pickle.load(f)
-    return scaler, label_encoder, onehot_encoder
+        flips = _flip_points(values, probs)
+        if not flips:
+            verdict = "Eligible" if probs[0] >= THRESHOLD else "Not yet eligible"
+            st.info(f"The prediction stays **{verdict}** over the whole range of {label.lower()}.")
+        for before, after, now_eligible in flips:
+            direction = "Eligible" if now_eligible else "Not yet eligible"
+            st.write(f"Between **{before}** and **{after}** the prediction flips to **{direction}**.")
+
+
+# ============================================================
+# "WHY THIS RESULT?" (all 15 fields in one batched forward pass)
+# ============================================================
+
+def render_explanation(model, preprocessor, person):
+    with st.expander("Why this result? (which answers moved the prediction)"):
+        prob, attributions = explain(model, preprocessor, person)
+
+        st.caption(
+            "Each bar: predicted probability minus the probability if this one answer "
+            "were replaced by the average of the training data. Positive = pushes "
+            "towards eligible."
+        )
+        st.bar_chart(
+            {
+                "Field": [FIELD_LABELS[field] for field, _ in attributions],
+                "Effect on probability": [a for _, a in attributions],
+            },
+            x="Field",
+            y="Effect on probability",
+        )
+
+        for field, a in attributions[:3]:
+            direction = "towards eligible" if a > 0 else "towards not eligible"
+            st.write(f"- **{FIELD_LABELS[field]}**: {a * 100:+.1f} percentage points {direction}")
 
 
 # ============================================================
@@ -64,9 +161,18 @@ def render_tab1():
 
 
     # ---- Load model + preprocessors (cached) ----
-    model = load_ann_model()
-    feature_columns = load_feature_columns()
-    scaler, label_encoder, onehot_encoder = load_preprocessors()
+    prediction_cache = get_prediction_cache()
+    prediction_cache.version()  # drops cached predictions if models/ changed
+
+    try:
+        bundle = load_eligibility_bundle(model_precision())
+    except (OSError, ValueError) as e:
+        # missing / corrupt bundle, or encoders that cannot produce every column
+        st.error(f"Could not load the eligibility model: {e}")
+        st.stop()
+
+    model = bundle.engine
+    preprocessor = bundle.preprocessor
 
     #with st.expander("Model details (technical)", expanded=False):
      #   st.success("✅ ANN model + preprocessors loaded.")
@@ -117,80 +223,80 @@ def render_tab1():
 
     st.subheader("Test the ANN with your own details")
 
+    # Every input is seeded from / saved to session_state (app_common), so the
+    # answers are still there after visiting another tab.
+
     # --- Basic numeric inputs ---
     col1, col2 = st.columns(2)
     with col1:
-        years_in_germany = st.number_input(
-            "Years in Germany", min_value=0, max_value=60, value=5, step=1
-        )
+        years_in_germany = remember("elig_years_in_germany", st.number_input(
+            "Years in Germany", min_value=0, max_value=60, value=remembered("elig_years_in_germany", 5), step=1,
+            key="elig_years_in_germany",
+        ))
     with col2:
-        age = st.number_input(
-            "Age", min_value=18, max_value=100, value=32, step=1
-        )
-
-    monthly_income_eur = st.number_input(
-        "Monthly income (EUR)", min_value=0, max_value=10000, value=1800, step=50
-    )
-
-    months_tax_paid_last_12 = st.number_input(
+        age = remember("elig_age", st.number_input(
+            "Age", min_value=18, max_value=100, value=remembered("elig_age", 32), step=1,
+            key="elig_age",
+        ))
+
+    monthly_income_eur = remember("elig_monthly_income_eur", st.number_input(
+        "Monthly income (EUR)", min_value=0, max_value=10000,
+        value=remembered("elig_monthly_income_eur", 1800), step=50,
+        key="elig_monthly_income_eur",
+    ))
+
+    months_tax_paid_last_12 = remember("elig_months_tax_paid_last_12", st.number_input(
         "Months of tax paid in the last 12 months",
-        min_value=0, max_value=12, value=12, step=1
-    )
+        min_value=0, max_value=12, value=remembered("elig_months_tax_paid_last_12", 12), step=1,
+        key="elig_months_tax_paid_last_12",
+    ))
 
     # --- Language level (raw, will be label-encoded) ---
-    language_level = st.selectbox(
-        "Language level", ["A1", "A2", "B1", "B2", "C1", "C2"], index=2  # default B1
-    )
+    language_levels = ["A1", "A2", "B1", "B2", "C1", "C2"]
+    language_level = remember("elig_language_level", st.selectbox(
+        "Language level", language_levels,
+        index=remembered_index("elig_language_level", language_levels, "B1"),
+        key="elig_language_level",
+    ))
 
     # --- Yes/No features as checkboxes -> 0/1 ---
+    def _yes_no(field, label, default):
+        key = f"elig_{field}"
+        return int(remember(key, st.checkbox(label, value=remembered(key, default), key=key)))
+
     col3, col4 = st.columns(2)
     with col3:
-        has_integration_course = int(
-            st.checkbox("Completed integration course?", value=True)
-        )
-        passed_naturalisation_test = int(
-            st.checkbox("Passed naturalisation test?", value=True)
-        )
-        has_permanent_residence = int(
-            st.checkbox("Has permanent residence?", value=False)
-        )
-        currently_paying_taxes = int(
-            st.checkbox("Currently paying taxes?", value=True)
-        )
+        has_integration_course = _yes_no("has_integration_course", "Completed integration course?", True)
+        passed_naturalisation_test = _yes_no("passed_naturalisation_test", "Passed naturalisation test?", True)
+        has_permanent_residence = _yes_no("has_permanent_residence", "Has permanent residence?", False)
+        currently_paying_taxes = _yes_no("currently_paying_taxes", "Currently paying taxes?", True)
 
     with col4:
-        has_criminal_record = int(
-            st.checkbox("Has criminal record?", value=False)
-        )
-        financial_independent = int(
-            st.checkbox("Financially independent?", value=True)
-        )
-        married_to_german = int(
-            st.checkbox("Married to German citizen?", value=False)
-        )
-        children_in_germany = int(
-            st.checkbox("Children living in Germany?", value=False)
-        )
+        has_criminal_record = _yes_no("has_criminal_record", "Has criminal record?", False)
+        financial_independent = _yes_no("financial_independent", "Financially independent?", True)
+        married_to_german = _yes_no("married_to_german", "Married to German citizen?", False)
+        children_in_germany = _yes_no("children_in_germany", "Children living in Germany?", False)
 
     # --- Categorical options from OneHotEncoder ---
-    nat_categories, permit_categories = onehot_encoder.categories_
+    nat_categories = preprocessor.onehot_categories["nationality"]
+    permit_categories = preprocessor.onehot_categories["resident_permit_type"]
 
-    nationality = st.selectbox(
+    nationality = remember("elig_nationality", st.selectbox(
         "Nationality",
         nat_categories,
-        index=list(nat_categories).index("syria") if "syria" in nat_categories else 0,
-    )
+        index=remembered_index("elig_nationality", nat_categories, "syria"),
+        key="elig_nationality",
+    ))
 
-    resident_permit_type = st.selectbox(
+    resident_permit_type = remember("elig_resident_permit_type", st.selectbox(
         "Resident permit type",
         permit_categories,
-        index=list(permit_categories).index("permanent_residence")
-        if "permanent_residence" in permit_categories
-        else 0,
-    )
+        index=remembered_index("elig_resident_permit_type", permit_categories, "permanent_residence"),
+        key="elig_resident_permit_type",
+    ))
 
     # =======================================================
-    # BUILD DATAFRAME FOR THIS PERSON
+    # BUILD FEATURE VECTOR FOR THIS PERSON
     # =======================================================
 
     example_person = {
@@ -211,42 +317,23 @@ def render_tab1():
         "resident_permit_type": resident_permit_type,
     }
 
-    raw_df = pd.DataFrame([example_person])
-
-    # 1) Encode language_level -> language_level_encoded
-    raw_df["language_level_encoded"] = label_encoder.transform(
-        raw_df["language_level"]
-    )
+    # Encode + one-hot + scale in training column order, straight into
+    # a float32 row (same result as the pandas path in eligibility_features),
+    # then predict in a micro-batch with other sessions' rows.
+    # Identical profiles from any session hit the shared cache.
+    batcher = load_batcher(bundle)
 
-    # 2) One-hot encode nationality + resident_permit_type
-    ohe_array = onehot_encoder.transform(
-        raw_df[["nationality", "resident_permit_type"]]
-    )
-    ohe_cols = onehot_encoder.get_feature_names_out(
-        ["nationality", "resident_permit_type"]
-    )
-    ohe_df = pd.DataFrame(ohe_array, columns=ohe_cols)
+    def _predict(person):
+        X_scaled = preprocessor.transform_one(person)
+        try:
+            return float(batcher.predict_one(X_scaled[0])[0])
+        except (RuntimeError, TimeoutError):
+            # batcher closed meanwhile (model or settings changed) or no answer
+            # within its timeout: predict this row directly
+            return float(bundle.engine.predict(X_scaled)[0, 0])
 
-    # 3) Combine and drop original categorical columns
-    full_df = pd.concat([raw_df, ohe_df], axis=1)
-    full_df = full_df.drop(
-        columns=["nationality", "resident_permit_type", "language_level"]
-    )
-
-    # 4) Reorder columns to match training order
-    missing_cols = set(feature_columns) - set(full_df.columns)
-    if missing_cols:
-        st.error(f"Missing columns in input: {missing_cols}")
-        st.write("Current columns:", list(full_df.columns))
-        st.write("Expected:", feature_columns)
-        st.stop()
-
-    X_input = full_df[feature_columns].copy()
-
-    # 5) Scale + predict
-    X_scaled = scaler.transform(X_input)
-    prob = float(model.predict(X_scaled)[0][0])
-    eligible_pred = prob >= 0.5
+    prob = prediction_cache.get_or_compute(example_person, _predict, bundle.version)
+    eligible_pred = prob >= THRESHOLD
 
     st.markdown(f"**Predicted probability of being eligible:** {prob:.2%}")
 
@@ -255,6 +342,9 @@ def render_tab1():
     else:
         st.error("❌ The model predicts: **Not yet eligible** (demo prediction).")
 
+    render_explanation(model, preprocessor, example_person)
+    render_what_if(model, preprocessor, example_person)
+
 
 # Allow running this file alone if you want
 if __name__ == "__main__":
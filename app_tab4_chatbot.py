@@ -1,8 +1,40 @@
+from functools import partial
+
 import streamlit as st
-from openai import OpenAI
 
-# NEW Gemini SDK
-from google import genai
+from app_common import remember, remembered, remembered_index, setting
+from chat_cache import DEFAULT_MAX_ENTRIES, DEFAULT_PATH, DEFAULT_TTL_S, get_answer_cache
+from chat_context import (
+    DEFAULT_CONTEXT_TOKENS,
+    DEFAULT_SUMMARY_TOKENS,
+    ConversationMemory,
+    to_messages,
+    to_prompt,
+    transcript,
+)
+from llm_clients import (
+    DEFAULT_CONNECT_TIMEOUT_S,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_MAX_KEEPALIVE,
+    DEFAULT_TIMEOUT_S,
+    get_client_pool,
+)
+from llm_dispatch import (
+    DEFAULT_DEADLINE_S,
+    DEFAULT_HEDGE_DELAY_S,
+    DEFAULT_MAX_CONCURRENT,
+    DEFAULT_MAX_WAITING,
+    AllCandidatesFailed,
+    Busy,
+    DeadlineExceeded,
+    DispatchError,
+    get_dispatcher,
+    get_limiter,
+    limited,
+)
+from llm_metrics import Usage, get_metrics_store, instrumented
+from official_index import ALLOWED_DOMAINS, INDEX_PATH, get_index, tokenize
+from single_flight import get_single_flight
 
 
 # ------------------------------------------------------------
@@ -14,18 +46,30 @@ def _get_keys():
     return openai_key, google_key
 
 
+def _connection_settings():
+    # LLM_TIMEOUT_S / LLM_CONNECT_TIMEOUT_S / LLM_MAX_CONNECTIONS /
+    # LLM_MAX_KEEPALIVE in .streamlit/secrets.toml
+    return {
+        "timeout_s": float(setting("LLM_TIMEOUT_S", DEFAULT_TIMEOUT_S)),
+        "connect_timeout_s": float(setting("LLM_CONNECT_TIMEOUT_S", DEFAULT_CONNECT_TIMEOUT_S)),
+        "max_connections": int(setting("LLM_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS)),
+        "max_keepalive": int(setting("LLM_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE)),
+    }
+
+
+# one pooled client per provider for the whole server (reused between turns)
 def _get_openai_client():
     api_key = st.secrets.get("OPENAI_API_KEY", "")
     if not api_key:
         return None
-    return OpenAI(api_key=api_key)
+    return get_client_pool().openai(api_key, **_connection_settings())
 
 
 def _get_gemini_client():
     api_key = st.secrets.get("GOOGLE_API_KEY", "")
     if not api_key:
         return None
-    return genai.Client(api_key=api_key)
+    return get_client_pool().gemini(api_key, **_connection_settings())
 
 
 # ------------------------------------------------------------
@@ -51,79 +95,382 @@ Mode: OFFICIAL SOURCES (browsing).
 - Be short and clear. No legal advice.
 """
 
-ALLOWED_DOMAINS = [
-    "bamf.de",
-    "bmi.bund.de",
-    "bva.bund.de",
-    "service.berlin.de",
-    "bundesregierung.de",
-]
+SYSTEM_PROMPT_GROUNDED = """
+You are 'Einbürgerung Helper' for German naturalisation (Einbürgerung).
 
+Mode: OFFICIAL SOURCES (saved copies of official pages).
+- Answer ONLY Einbürgerung questions.
+- Use ONLY the official passages below. If they do not answer the question, say so.
+- Mention the site you used (example: “According to bamf.de…”).
+- Be short and clear. No legal advice.
 
-# ------------------------------------------------------------
-# Chat logic
-# ------------------------------------------------------------
-def _answer_with_openai(user_q: str, use_search: bool) -> str:
-    system_prompt = SYSTEM_PROMPT_BROWSE if use_search else SYSTEM_PROMPT_FAST
+Official passages:
+"""
 
-    client = _get_openai_client()
-    if client is None:
-        return "OpenAI is not configured (missing OPENAI_API_KEY)."
+SYSTEM_PROMPT_SUMMARY = """
+You keep a running summary of a chat about German naturalisation (Einbürgerung).
+- Merge the new messages into the summary so far.
+- Keep what the user said about their situation (years in Germany, nationality,
+  language level, Bundesland, ...), what was already answered and open questions.
+- Drop greetings and small talk.
+- Plain text, at most {words} words.
+"""
+
+OPENAI_FAST_MODEL = "gpt-4.1-mini"
+OPENAI_BROWSE_MODEL = "gpt-5"
+GEMINI_MODELS = ["gemini-2.0-flash", "gemini-1.5-flash"]
+
+# Notices shown instead of an answer (never cached)
+OPENAI_MISSING = "OpenAI is not configured (missing OPENAI_API_KEY)."
+GEMINI_MISSING = "Gemini is not configured (missing GOOGLE_API_KEY)."
+BROWSE_OPENAI_ONLY = (
+    "The saved official pages do not cover this question and live web search is OpenAI-only. "
+    "Switch provider to OpenAI for that."
+)
+ANSWER_FAILED = "No provider could answer."
+ANSWER_TIMEOUT = "No answer within the time limit, please try again."
+ANSWER_BUSY = "The chatbot is very busy right now, please try again in a minute."
+ANSWER_STOPPED = "(Answer stopped early:"
 
-    if use_search:
-        r = client.responses.create(
-            model="gpt-5",
+
+# ------------------------------------------------------------
+# Provider calls (async, run on the llm_dispatch event loop)
+# ------------------------------------------------------------
+async def _openai_chunks(client, model: str, system_prompt: str, user_q: str, web_search: bool = False,
+                         context=None):
+    messages = [
+        {"role": "system", "content": system_prompt},
+        *(to_messages(*context) if context else []),
+        {"role": "user", "content": user_q},
+    ]
+
+    if web_search:
+        stream = await client.responses.create(
+            model=model,
             tools=[{"type": "web_search", "filters": {"allowed_domains": ALLOWED_DOMAINS}}],
-            input=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_q},
-            ],
+            input=messages,
+            stream=True,
         )
-        return r.output_text
-
-    c = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_q},
-        ],
+        try:
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    yield event.delta
+                elif event.type == "response.completed" and event.response.usage:
+                    yield Usage(event.response.usage.input_tokens, event.response.usage.output_tokens)
+        finally:
+            await stream.close()
+        return
+
+    stream = await client.chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},  # usage arrives in a last chunk without choices
+    )
+    try:
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.usage:
+                yield Usage(chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+    finally:
+        await stream.close()
+
+
+async def _gemini_chunks(client, model: str, system_prompt: str, user_q: str, context=None):
+    history = f"{to_prompt(*context)}\n\n" if context else ""
+    prompt = f"{system_prompt}\n\n{history}User question:\n{user_q}"
+    usage = None
+    async for chunk in await client.aio.models.generate_content_stream(model=model, contents=prompt):
+        if chunk.text:
+            yield chunk.text
+        usage = chunk.usage_metadata or usage  # running totals, the last one counts
+    if usage is not None:
+        yield Usage(usage.prompt_token_count or 0, usage.candidates_token_count or 0)
+
+
+def _limiter(provider: str):
+    # CHAT_MAX_CONCURRENT_PER_PROVIDER / CHAT_MAX_WAITING_PER_PROVIDER in .streamlit/secrets.toml
+    return get_limiter(
+        provider,
+        max_concurrent=int(setting("CHAT_MAX_CONCURRENT_PER_PROVIDER", DEFAULT_MAX_CONCURRENT)),
+        max_waiting=int(setting("CHAT_MAX_WAITING_PER_PROVIDER", DEFAULT_MAX_WAITING)),
     )
-    return c.choices[0].message.content
 
 
-def _answer_with_gemini(user_q: str) -> str:
-    client = _get_gemini_client()
-    if client is None:
-        return "Gemini is not configured (missing GOOGLE_API_KEY)."
+def _candidate(provider: str, model: str, factory, label: str = ""):
+    """
+    (label, factory) for the dispatcher: limited per provider, and timed /
+    token-counted once it has a slot (LLM_METRICS_EXPORT_PATH in
+    .streamlit/secrets.toml also appends every call to a JSONL file).
+    Labels start with the provider; the answer cache relies on it.
+    """
+    label = label or f"{provider} {model}"
+    metrics = get_metrics_store(export_path=setting("LLM_METRICS_EXPORT_PATH", ""))
+    return label, limited(_limiter(provider), instrumented(metrics, label, model, factory))
 
-    prompt = f"{SYSTEM_PROMPT_FAST}\n\nUser question:\n{user_q}"
 
-    # Try a couple model names commonly supported by the new SDK
-    model_names = ["gemini-2.0-flash", "gemini-1.5-flash"]
+def _dispatch_settings():
+    # CHAT_HEDGE_DELAY_S / CHAT_DEADLINE_S in .streamlit/secrets.toml
+    return {
+        "hedge_delay_s": float(setting("CHAT_HEDGE_DELAY_S", DEFAULT_HEDGE_DELAY_S)),
+        "deadline_s": float(setting("CHAT_DEADLINE_S", DEFAULT_DEADLINE_S)),
+    }
 
-    last_error = None
-    for name in model_names:
-        try:
-            resp = client.models.generate_content(
-                model=name,
-                contents=prompt,
+
+# ------------------------------------------------------------
+# Offline official sources (index built by build_official_index.py)
+# ------------------------------------------------------------
+def _retrieve(user_q: str):
+    """
+    -> (hits, confidence) from the local index, ([], 0.0) without one.
+    OFFICIAL_INDEX_PATH / OFFICIAL_INDEX_TOP_K in .streamlit/secrets.toml
+    """
+    index = get_index(setting("OFFICIAL_INDEX_PATH", INDEX_PATH))
+    if index is None:
+        return [], 0.0
+    return index.search(user_q, k=int(setting("OFFICIAL_INDEX_TOP_K", 4)))
+
+
+def _grounded_prompt(hits) -> str:
+    passages = [f"[{i}] {p['title']} ({p['url']})\n{p['text']}" for i, (_, p) in enumerate(hits, 1)]
+    return SYSTEM_PROMPT_GROUNDED + "\n\n".join(passages)
+
+
+def _sources_footer(hits) -> str:
+    links = {p["url"]: p["title"] for _, p in hits}
+    return "\n\nSources (saved copies): " + ", ".join(f"[{title}]({url})" for url, title in links.items())
+
+
+def _direct_answer(user_q: str, hits, confidence: float):
+    """
+    The best passage itself when it clearly covers a specific question
+    (OFFICIAL_INDEX_DIRECT_CONFIDENCE, default 0.9; set above 1 to turn off).
+    """
+    if confidence < float(setting("OFFICIAL_INDEX_DIRECT_CONFIDENCE", 0.9)):
+        return None
+    if len(set(tokenize(user_q))) < 3:  # one- or two-word questions match too easily
+        return None
+    _, best = hits[0]
+    return f"{best['text']}{_sources_footer(hits[:1])}"
+
+
+# ------------------------------------------------------------
+# Which models to ask
+# ------------------------------------------------------------
+def _provider_candidates(provider: str, system_prompt: str, user_q: str, context=None, purpose: str = ""):
+    """
+    Fast models in hedging order: the chosen provider first, then the other
+    one (CHAT_HEDGE_ACROSS_PROVIDERS = false keeps it to the chosen provider).
+    """
+    openai_client = _get_openai_client()
+    gemini_client = _get_gemini_client()
+    suffix = f" ({purpose})" if purpose else ""
+
+    openai = []
+    if openai_client is not None:
+        openai.append(_candidate(
+            "OpenAI", OPENAI_FAST_MODEL,
+            partial(_openai_chunks, openai_client, OPENAI_FAST_MODEL, system_prompt, user_q, context=context),
+            label=f"OpenAI {OPENAI_FAST_MODEL}{suffix}",
+        ))
+
+    gemini = []
+    if gemini_client is not None:
+        gemini = [
+            _candidate(
+                "Gemini", name,
+                partial(_gemini_chunks, gemini_client, name, system_prompt, user_q, context=context),
+                label=f"Gemini {name}{suffix}",
             )
-            return resp.text
-        except Exception as e:
-            last_error = e
+            for name in GEMINI_MODELS
+        ]
+
+    primary, other = (openai, gemini) if provider == "OpenAI" else (gemini, openai)
+    if not setting("CHAT_HEDGE_ACROSS_PROVIDERS", True):
+        other = []
+    return primary + other
+
+
+def _candidates(user_q: str, provider: str, use_search: bool, context=None):
+    """
+    -> (reply, [], "") when no model needs to be called (a notice or an
+    answer straight from the offline index), else (None, candidates, footer).
+
+    Official sources: the local index first; a live gpt-5 web search only
+    when retrieval confidence is below OFFICIAL_INDEX_MIN_CONFIDENCE.
+    context: (summary, recent messages) from ConversationMemory, or None.
+    """
+    if provider == "OpenAI" and _get_openai_client() is None:
+        return OPENAI_MISSING, [], ""
+    if provider == "Gemini" and _get_gemini_client() is None:
+        return GEMINI_MISSING, [], ""
+
+    if not use_search:
+        return None, _provider_candidates(provider, SYSTEM_PROMPT_FAST, user_q, context), ""
+
+    hits, confidence = _retrieve(user_q)
+    if hits and confidence >= float(setting("OFFICIAL_INDEX_MIN_CONFIDENCE", 0.5)):
+        direct = _direct_answer(user_q, hits, confidence)
+        if direct:
+            return direct, [], ""
+        return None, _provider_candidates(provider, _grounded_prompt(hits), user_q, context), _sources_footer(hits)
+
+    # live browsing: OpenAI web search only, nothing to hedge with
+    if provider == "Gemini":
+        return BROWSE_OPENAI_ONLY, [], ""
+    browse = _candidate(
+        "OpenAI", OPENAI_BROWSE_MODEL,
+        partial(_openai_chunks, _get_openai_client(), OPENAI_BROWSE_MODEL, SYSTEM_PROMPT_BROWSE, user_q, True, context),
+        label=f"OpenAI {OPENAI_BROWSE_MODEL} (web search)",
+    )
+    return None, [browse], ""
 
-    return f"Gemini failed. Last error: {last_error}"
 
+# ------------------------------------------------------------
+# Answer cache (repeat questions: no API call)
+# ------------------------------------------------------------
+def _get_answer_cache():
+    # CHAT_CACHE_PATH / CHAT_CACHE_MAX_ENTRIES / CHAT_CACHE_TTL_FAST_S /
+    # CHAT_CACHE_TTL_OFFICIAL_S in .streamlit/secrets.toml
+    return get_answer_cache(
+        path=setting("CHAT_CACHE_PATH", DEFAULT_PATH),
+        ttl_s={
+            "fast": float(setting("CHAT_CACHE_TTL_FAST_S", DEFAULT_TTL_S["fast"])),
+            "official": float(setting("CHAT_CACHE_TTL_OFFICIAL_S", DEFAULT_TTL_S["official"])),
+        },
+        max_entries=int(setting("CHAT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    )
+
+
+def _mode(use_search: bool) -> str:
+    return "official" if use_search else "fast"
+
+
+def _is_cacheable(answer) -> bool:
+    if not answer or answer in (OPENAI_MISSING, GEMINI_MISSING, BROWSE_OPENAI_ONLY):
+        return False
+    if answer in (ANSWER_TIMEOUT, ANSWER_BUSY) or answer.startswith(ANSWER_FAILED):
+        return False
+    return ANSWER_STOPPED not in answer
+
+
+# ------------------------------------------------------------
+# Answers (streamed; identical in-flight questions share one call)
+# ------------------------------------------------------------
+def _stream_uncached(user_q: str, provider: str, use_search: bool, context=None, winner=None):
+    """
+    Plans the call here, in the session thread (secrets, clients, index);
+    the returned generator only talks to the dispatcher.
+    winner: optional dict, gets "label" of the candidate that answered.
+    """
+    reply, candidates, footer = _candidates(user_q, provider, use_search, context)
+    return _stream_planned(reply, candidates, footer, _dispatch_settings(), winner)
+
+
+def _stream_planned(reply, candidates, footer, settings, winner=None):
+    if reply:
+        yield reply
+        return
+
+    started = False
+    stream = get_dispatcher().stream(candidates, **settings)
+    try:
+        while True:
+            try:
+                chunk = next(stream)
+            except StopIteration as end:
+                if winner is not None:
+                    winner["label"] = end.value
+                break
+            started = True
+            yield chunk
+    except DispatchError as e:
+        if started:
+            yield f"\n\n{ANSWER_STOPPED} {e})"
+        elif isinstance(e, DeadlineExceeded):
+            yield ANSWER_TIMEOUT
+        elif isinstance(e, AllCandidatesFailed) and e.errors and all(isinstance(err, Busy) for _, err in e.errors):
+            yield ANSWER_BUSY
+        else:
+            yield f"{ANSWER_FAILED} Last error: {e}"
+        return
+
+    if footer:
+        yield footer
+
+
+def stream_answer(user_q: str, provider: str, use_search: bool, context=None):
+    """
+    Cached answer, or the chunks of one upstream call shared by every
+    session asking the same question at the same time.
+
+    Follow-up questions (a non-empty context) depend on their conversation:
+    they are neither cached nor shared.
 
-def answer_question(user_q: str, provider: str, use_search: bool) -> str:
-    if provider == "OpenAI":
-        return _answer_with_openai(user_q, use_search=use_search)
+    With hedging across providers the answer can come from the other
+    provider: it is then stored under that one, so the cache never serves
+    one provider's answer as the other's.
+    """
+    if context and (context[0] or context[1]):
+        yield from _stream_uncached(user_q, provider, use_search, context)
+        return
+
+    cache = _get_answer_cache()
+    mode = _mode(use_search)
+    cached = cache.get(provider, mode, user_q)
+    if cached is not None:
+        yield cached
+        return
+
+    def make_producer():
+        winner = {}
+        chunks = _stream_uncached(user_q, provider, use_search, winner=winner)
+
+        def produce():
+            parts = []
+            for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+            # only reached when the stream finished without an exception
+            answer = "".join(parts)
+            if _is_cacheable(answer) and "label" in winner:
+                answered_by = winner["label"].split(" ", 1)[0]  # labels start with the provider
+                cache.put(answered_by, mode, user_q, answer)
+
+        return produce()
+
+    yield from get_single_flight().stream(cache.make_key(provider, mode, user_q), make_producer)
+
+
+def answer_question(user_q: str, provider: str, use_search: bool, context=None) -> str:
+    return "".join(stream_answer(user_q, provider, use_search, context))
 
-    # provider == Gemini
-    if use_search:
-        return "Official sources mode is OpenAI-only right now. Switch provider to OpenAI for that."
 
-    return _answer_with_gemini(user_q)
+# ------------------------------------------------------------
+# Conversation context (token budget + running summary)
+# ------------------------------------------------------------
+def _context_budget():
+    # CHAT_CONTEXT_TOKENS in .streamlit/secrets.toml (0 = no history)
+    return int(setting("CHAT_CONTEXT_TOKENS", DEFAULT_CONTEXT_TOKENS))
+
+
+def _summary_job(provider: str, old_summary: str, messages):
+    """
+    Planned in the session thread; the returned job runs in the background.
+    """
+    words = int(setting("CHAT_SUMMARY_TOKENS", DEFAULT_SUMMARY_TOKENS)) * 3 // 4
+    content = f"Summary so far:\n{old_summary or '(none)'}\n\nNew messages:\n{transcript(messages)}"
+    candidates = _provider_candidates(
+        provider, SYSTEM_PROMPT_SUMMARY.format(words=words), content, purpose="summary"
+    )
+    settings = _dispatch_settings()
+
+    def job():
+        _, summary = get_dispatcher().answer(candidates, **settings)
+        return summary.strip()
+
+    return job
 
 
 # ------------------------------------------------------------
@@ -144,21 +491,46 @@ def render_tab4():
         st.warning("Chatbot is disabled because API keys are missing in .streamlit/secrets.toml")
         return
 
-    provider = st.selectbox("Provider", provider_options)
-    use_official = st.toggle("Official sources (OpenAI only)", value=False)
+    # seeded from session_state (app_common): kept while another tab is open
+    provider = remember("chat_provider", st.selectbox(
+        "Provider", provider_options, index=remembered_index("chat_provider", provider_options, provider_options[0]),
+        key="chat_provider",
+    ))
+    use_official = remember("chat_official", st.toggle(
+        "Official sources",
+        value=remembered("chat_official", False),
+        key="chat_official",
+        help="Answers from saved copies of official pages; live web search (OpenAI only) when they do not cover the question.",
+    ))
 
     if "chat" not in st.session_state:
         st.session_state.chat = []
+    if "chat_memory" not in st.session_state:
+        st.session_state.chat_memory = ConversationMemory()
+    memory = st.session_state.chat_memory
+    budget = _context_budget()
 
     for m in st.session_state.chat:
         st.chat_message(m["role"]).write(m["content"])
 
     prompt = st.chat_input("Ask about Einbürgerung…")
     if prompt:
+        # earlier turns, fitted into the token budget
+        context = memory.build(st.session_state.chat, budget) if budget > 0 else None
+
         st.session_state.chat.append({"role": "user", "content": prompt})
-        reply = answer_question(prompt, provider=provider, use_search=use_official)
+        st.chat_message("user").write(prompt)
+
+        # tokens are rendered as they arrive; write_stream returns the full text
+        with st.chat_message("assistant"):
+            reply = st.write_stream(
+                stream_answer(prompt, provider=provider, use_search=use_official, context=context)
+            )
         st.session_state.chat.append({"role": "assistant", "content": reply})
-        st.rerun()
+
+        # fold turns that no longer fit into the summary, off the answer path
+        if budget > 0:
+            memory.maybe_update(st.session_state.chat, partial(_summary_job, provider), budget)
 
 
 if __name__ == "__main__":
@@ -1,19 +1,9 @@
 import streamlit as st
 
+from official_index import OFFICIAL_LINKS
+
+
 def render_tab5():
     st.title("Official information & helpful websites")
 
-    st.markdown(
-            """
-    - [BAMF – Bundesamt für Migration und Flüchtlinge](https://www.bamf.de)
-    - [BMI – Bundesministerium des Innern](https://www.bmi.bund.de)
-    - [BVA – Bundesverwaltungsamt](https://www.bva.bund.de)
-    - [Einbürgerung.de – Information portal](https://www.einbuergerung.de)
-    - [Publikationen der Bundesregierung](https://www.publikationen-bundesregierung.de)
-    - [Integrationsbeauftragte der Bundesregierung](https://www.integrationsbeauftragte.de)
-    - [Handbook Germany](https://handbookgermany.de)
-    - [Deutschland.de](https://www.deutschland.de)
-    - [Tatsachen über Deutschland](https://www.tatsachen-ueber-deutschland.de)
-    - [Service-Portal (example: Berlin)](https://service.berlin.de)
-            """
-        )
\ No newline at end of file
+    st.markdown("\n".join(f"- [{title}]({url})" for title, url in OFFICIAL_LINKS))
\ No newline at end of file
@@ -1,11 +1,23 @@
+import sys
+
 import streamlit as st
-import pickle
+
+from app_tab1_eligibility import load_eligibility_bundle, model_precision
+from chat_cache import answer_cache_stats
+from inference_batcher import batcher_stats
+from llm_dispatch import dispatch_stats, limiter_stats
+from llm_metrics import metrics_summary
+from prediction_cache import get_prediction_cache
+from quiz_catalog import catalog_stats
+from quiz_db import attempt_writer_stats
+from single_flight import single_flight_stats
+from tab_registry import IMPORT_TIMES
 
 def render_tab7():
     st.title("Model details (technical info)")
 
-    with open("models/eligibility_feature_columns.pkl", "rb") as f:
-        cols = pickle.load(f)
+    bundle = load_eligibility_bundle(model_precision())
+    cols = bundle.feature_columns
 
     st.write(f"Model input features: **{len(cols)}**")
     st.write("First 10 feature names:")
@@ -18,4 +30,170 @@ def render_tab7():
     - Threshold: 0.5
     - This model does NOT make legal decisions
     """)
+    st.caption(
+        f"Model bundle: {bundle.path} ({bundle.precision}, format {bundle.header['format_version']}, "
+        f"version {bundle.version}, created {bundle.metadata.get('created', 'unknown')})"
+    )
+
+    st.subheader("Tab import times (this server process)")
+    if IMPORT_TIMES:
+        st.table({
+            "Tab": list(IMPORT_TIMES),
+            "Import time (ms)": [f"{t * 1000:.1f}" for t in IMPORT_TIMES.values()],
+        })
+    st.caption("Each tab's module is imported the first time someone opens it.")
+
+    st.subheader("Eligibility prediction cache (shared by all sessions)")
+    stats = get_prediction_cache().stats()
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Entries", f"{stats['size']} / {stats['maxsize']}")
+    c2.metric("Hit rate", f"{stats['hit_rate']:.0%}")
+    c3.metric("Hits / misses", f"{stats['hits']} / {stats['misses']}")
+    c4.metric("Evictions", stats["evictions"])
+    st.caption(
+        f"Model artifacts version {stats['artifacts_version']} "
+        f"(cache cleared {stats['invalidations']}x after model changes)."
+    )
+
+    st.subheader("Eligibility micro-batching (shared by all sessions)")
+    batching = batcher_stats("eligibility")
+    if batching is None:
+        st.caption("No eligibility prediction has been made in this server process yet.")
+    else:
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Requests / batches", f"{batching['requests']} / {batching['batches']}")
+        c2.metric("Mean batch size", f"{batching['mean_batch_size']:.1f}")
+        c3.metric("Queue depth (max)", f"{batching['queue_depth']} ({batching['max_queue_depth']})")
+        c4.metric("Errors", batching["errors"])
+        st.caption(
+            f"Window {batching['window_ms']:g} ms, max batch {batching['max_batch_size']}. "
+            f"Batch sizes seen: {batching['batch_size_counts']}"
+        )
+
+    st.subheader("Chatbot answer cache")
+    caches = answer_cache_stats()
+    if not caches:
+        st.caption("The chatbot has not been used in this server process yet.")
+    for path, c in caches.items():
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Cached answers", f"{c['size']} / {c['max_entries']}")
+        c2.metric("Hit rate", f"{c['hit_rate']:.0%}")
+        c3.metric("Hits / misses", f"{c['hits']} / {c['misses']}")
+        c4.metric("Expired / evicted", f"{c['expired']} / {c['evictions']}")
+        st.caption(f"SQLite file: {path}")
+
+    st.subheader("Chatbot API clients (shared by all sessions)")
+    # llm_clients loads the provider SDKs (~1-2s): only read it if the chatbot already did
+    llm_clients = sys.modules.get("llm_clients")
+    if llm_clients is None:
+        st.caption("The chatbot has not been opened in this server process yet.")
+    else:
+        pool = llm_clients.client_pool_stats()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Pooled clients", ", ".join(pool["providers"]) or "none")
+        c2.metric("Clients built", pool["builds"])
+        c3.metric("Reused", pool["reuses"])
+        st.caption("A client is rebuilt only when its API key or connection settings change.")
+
+    st.subheader("Chatbot hedged requests")
+    hedging = dispatch_stats()
+    if hedging is None:
+        st.caption("The chatbot has not called a provider in this server process yet.")
+    else:
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Questions", hedging["races"])
+        c2.metric("Hedges / fallbacks", f"{hedging['hedges']} / {hedging['fallbacks']}")
+        c3.metric("Cancelled losers", hedging["cancelled"])
+        c4.metric("Failures / timeouts", f"{hedging['failures']} / {hedging['timeouts']}")
+        st.caption(f"Answered by: {hedging['wins']}")
+
+    st.subheader("Chatbot request coalescing and provider limits")
+    flights = single_flight_stats()
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Upstream answers", flights["leaders"])
+    c2.metric("Shared with waiting sessions", flights["coalesced"])
+    c3.metric("In flight now", flights["in_flight"])
+    for provider, lim in limiter_stats().items():
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric(f"{provider} running", f"{lim['active']} / {lim['max_concurrent']}")
+        c2.metric("Waiting (max seen)", f"{lim['waiting']} ({lim['max_waiting_seen']}) / {lim['max_waiting']}")
+        c3.metric("Admitted", lim["admitted"])
+        c4.metric("Rejected as busy", lim["rejected"])
+
+    st.subheader("Chatbot latency, tokens and cost (last hour)")
+    summary = metrics_summary()
+    if not summary or not summary["calls"]:
+        st.caption("No provider call has been made in this server process yet.")
+    else:
+        def ms(p):
+            return " / ".join("-" if p[k] is None else f"{p[k]:.0f}" for k in ("p50", "p95", "p99"))
+
+        calls = summary["calls"]
+        st.table({
+            "Model": list(calls),
+            "Calls (ok / error / cancelled)": [f"{c['calls']} ({c['ok']} / {c['errors']} / {c['cancelled']})" for c in calls.values()],
+            "First text ms p50 / p95 / p99": [ms(c["ttft_ms"]) for c in calls.values()],
+            "Total ms p50 / p95 / p99": [ms(c["wall_ms"]) for c in calls.values()],
+            "Tokens in / out": [f"{c['input_tokens']} / {c['output_tokens']}" for c in calls.values()],
+            "Est. cost (USD)": ["-" if c["cost_usd"] is None else f"{c['cost_usd']:.5f}" for c in calls.values()],
+        })
+        races = summary["races"]
+        st.caption(
+            f"{races['questions']} questions, {races['unanswered']} unanswered; "
+            f"answered by a later candidate (hedge / fallback) {races['fallbacks']}x {races['fallbacks_by_first'] or ''}; "
+            f"winner decided after {ms(races['decided_ms'])} ms (p50 / p95 / p99). "
+            "Cancelled calls lost a race. Costs use list prices without web search fees."
+        )
+        errors = {label: c["last_error"] for label, c in calls.items() if c["last_error"]}
+        if errors:
+            st.caption(f"Last errors: {errors}")
+
+    st.subheader("Chatbot conversation memory (this session)")
+    memory = st.session_state.get("chat_memory")
+    if memory is None:
+        st.caption("No chat in this session yet.")
+    else:
+        mem = memory.stats()
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Messages in summary", mem["summarized_messages"])
+        c2.metric("Summary tokens (est.)", mem["summary_tokens"])
+        c3.metric("Summary updates", mem["updates"])
+        c4.metric("Failed updates", mem["failures"])
+        st.caption(
+            "Follow-up questions carry the newest messages verbatim and a running summary of the "
+            "older ones, within CHAT_CONTEXT_TOKENS."
+        )
+
+    st.subheader("Quiz question catalogue (shared by all sessions)")
+    catalog = catalog_stats()
+    if catalog is None:
+        st.caption("The quiz has not been opened in this server process yet.")
+    else:
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Questions loaded", f"{catalog['loaded']} / {catalog['questions']}")
+        c2.metric("Served from memory", catalog["hits"])
+        c3.metric("Version checks", catalog["version_checks"])
+        c4.metric("Full loads", catalog["loads"])
+        st.caption(
+            f"Version {catalog['version']}, checked every {catalog['ttl_s']:g}s; the table is read again "
+            "only when it changed. Sessions keep only their shuffle order. "
+            f"Loaded in {catalog['pages']} pages of {catalog['page_size']} "
+            f"({catalog['prefetches']} background prefetches, {catalog['waits']} reads had to wait)."
+            + (f" Last error: {catalog['last_error']}" if catalog["last_error"] else "")
+        )
 
+    st.subheader("Quiz attempt writes (shared by all sessions)")
+    writes = attempt_writer_stats()
+    if writes is None:
+        st.caption("No quiz answer has been checked in this server process yet.")
+    else:
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Attempts written", f"{writes['written']} / {writes['buffered']}")
+        c2.metric("Insert batches", writes["batches"])
+        c3.metric("Pending (max)", f"{writes['pending']} / {writes['max_backlog']}")
+        c4.metric("Dropped", writes["dropped"])
+        st.caption(
+            f"Answer checks only queue the attempt; it is inserted in batches in the background. "
+            f"Failed inserts (retried): {writes['failed_inserts']}."
+            + (f" Last error: {writes['last_error']}" if writes.get("last_error") else "")
+        )
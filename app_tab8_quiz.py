@@ -1,65 +1,139 @@
 import streamlit as st
 import random
+import time
 import uuid
-from supabase import create_client
+from array import array
+
+from app_common import remember, remembered_index, setting
+from quiz_catalog import DEFAULT_PAGE_SIZE, DEFAULT_TTL_S, PREFETCH_AHEAD, get_catalog_cache
+from quiz_db import DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_INTERVAL_S, DEFAULT_MAX_BACKLOG, get_attempt_writer
+from quiz_exam import EXAM_GENERAL, EXAM_MINUTES, EXAM_STATE, PASS_MARK, get_exam_index, score_exam
+from quiz_store import DEFAULT_SEED_CSV, DEFAULT_SQLITE_PATH, STATES, get_question_store
 
 OFFICIAL_QUIZ_CATALOG_URL = "https://www.lebenindeutschland.eu/fragenkatalog"
 
 
 # ----------------------------
-# SUPABASE HELPERS
+# STORAGE HELPERS
 # ----------------------------
-def _get_supabase_client():
-    url = st.secrets["SUPABASE_URL"]
-    key = st.secrets["SUPABASE_ANON_KEY"]
-    return create_client(url, key)
+def _get_store():
+    """
+    QUIZ_BACKEND in .streamlit/secrets.toml: "supabase" (public.questions /
+    public.attempts) or "sqlite" (local file QUIZ_SQLITE_PATH, seeded from
+    QUIZ_SEED_CSV). Default: supabase when SUPABASE_URL is set.
 
+    Supabase public.questions needs: id, question, option_a..option_d, correct_option.
+    Optional: category, state (mock exam Bundesland questions) and
+    QUIZ_VERSION_COLUMN (default updated_at, cheap change checks); see SupabaseStore.
+    """
+    backend = setting("QUIZ_BACKEND", "supabase" if setting("SUPABASE_URL", None) else "sqlite")
+    if backend == "sqlite":
+        return get_question_store(
+            "sqlite",
+            path=setting("QUIZ_SQLITE_PATH", DEFAULT_SQLITE_PATH),
+            seed_csv=setting("QUIZ_SEED_CSV", DEFAULT_SEED_CSV),
+        )
+    return get_question_store(
+        backend,
+        url=st.secrets["SUPABASE_URL"],
+        key=st.secrets["SUPABASE_ANON_KEY"],
+        version_column=setting("QUIZ_VERSION_COLUMN", "updated_at"),
+    )
 
-def _fetch_questions(limit=50):
+
+def _get_catalog():
     """
-    Fetch questions from Supabase table: public.questions
-    Expected columns:
-      id, question, option_a, option_b, option_c, option_d, correct_option
+    The question catalogue shared by all sessions; reloaded only when its
+    version changed (checked every QUIZ_CATALOG_TTL_S seconds). Loaded in
+    pages of QUIZ_PAGE_SIZE questions (only the columns the quiz shows):
+    the first one before the quiz is shown, the next ones in the background.
+    """
+    store = _get_store()
+    cache = get_catalog_cache(
+        store.signature,
+        store.fetch_page,
+        store.catalog_version,
+        ttl_s=float(setting("QUIZ_CATALOG_TTL_S", DEFAULT_TTL_S)),
+        page_size=int(setting("QUIZ_PAGE_SIZE", DEFAULT_PAGE_SIZE)),
+    )
+    return cache.get()
+
+
+def _get_attempt_writer():
+    """
+    Write-behind buffer for the attempts table (settings in .streamlit/secrets.toml:
+    QUIZ_ATTEMPT_BATCH_SIZE / QUIZ_ATTEMPT_FLUSH_S / QUIZ_ATTEMPT_MAX_BACKLOG).
     """
-    supabase = _get_supabase_client()
-    res = supabase.table("questions").select("*").limit(limit).execute()
-    return res.data or []
+    store = _get_store()
+    return get_attempt_writer(
+        store.signature,
+        store.insert_attempts,
+        batch_size=int(setting("QUIZ_ATTEMPT_BATCH_SIZE", DEFAULT_BATCH_SIZE)),
+        flush_interval_s=float(setting("QUIZ_ATTEMPT_FLUSH_S", DEFAULT_FLUSH_INTERVAL_S)),
+        max_backlog=int(setting("QUIZ_ATTEMPT_MAX_BACKLOG", DEFAULT_MAX_BACKLOG)),
+    )
 
 
 def _insert_attempt(question_id: int, selected_option: str, is_correct: bool):
     """
-    Insert a single attempt into Supabase table: public.attempts
+    Queue a single attempt for the attempts table
     Expected columns:
       session_id, question_id, selected_option, is_correct
+    Rows are inserted in batches in the background; this does not wait for the database.
     """
-    supabase = _get_supabase_client()
-    supabase.table("attempts").insert(
+    _get_attempt_writer().add(
         {
             "session_id": st.session_state.session_id,
             "question_id": question_id,
             "selected_option": selected_option,  # "A" / "B" / "C" / "D"
             "is_correct": is_correct,
         }
-    ).execute()
+    )
 
 
 # ----------------------------
 # SESSION STATE
 # ----------------------------
-def _init_quiz_state(total_questions: int):
-    # anonymous tracking
-    if "session_id" not in st.session_state:
-        st.session_state.session_id = str(uuid.uuid4())
+def _new_order(total_questions: int, block_size=None):
+    """
+    The session's shuffle order: compact indices into the shared catalogue.
+    With block_size (catalogue still loading) the order is shuffled within
+    blocks of that many questions and the blocks follow each other, so the
+    questions needed next are always in the next page to load.
+    """
+    if not block_size:
+        order = array("I", range(total_questions))
+        random.shuffle(order)
+        return order
+
+    order = array("I")
+    for start in range(0, total_questions, block_size):
+        block = array("I", range(start, min(start + block_size, total_questions)))
+        random.shuffle(block)
+        order.extend(block)
+    return order
+
+
+def _block_size(questions):
+    return None if questions.complete else questions.page_size
+
 
-    # store total so if DB size changes we reset safely
+def _init_quiz_state(total_questions: int, version=None, block_size=None):
+    # store total / catalogue version so if the DB changes we reset safely
     if "quiz_total" not in st.session_state:
         st.session_state.quiz_total = total_questions
+    if "quiz_catalog_version" not in st.session_state:
+        st.session_state.quiz_catalog_version = version
 
     # question order
-    if "quiz_index_order" not in st.session_state or st.session_state.quiz_total != total_questions:
+    if (
+        "quiz_index_order" not in st.session_state
+        or st.session_state.quiz_total != total_questions
+        or st.session_state.quiz_catalog_version != version
+    ):
         st.session_state.quiz_total = total_questions
-        st.session_state.quiz_index_order = list(range(total_questions))
-        random.shuffle(st.session_state.quiz_index_order)
+        st.session_state.quiz_catalog_version = version
+        st.session_state.quiz_index_order = _new_order(total_questions, block_size)
         st.session_state.quiz_pos = 0
         st.session_state.quiz_score = 0
         st.session_state.quiz_answered = False
@@ -82,10 +156,9 @@ def _init_quiz_state(total_questions: int):
         st.session_state.quiz_feedback = ""
 
 
-def _reset_quiz(total_questions: int):
+def _reset_quiz(total_questions: int, block_size=None):
     st.session_state.quiz_total = total_questions
-    st.session_state.quiz_index_order = list(range(total_questions))
-    random.shuffle(st.session_state.quiz_index_order)
+    st.session_state.quiz_index_order = _new_order(total_questions, block_size)
     st.session_state.quiz_pos = 0
     st.session_state.quiz_score = 0
     st.session_state.quiz_answered = False
@@ -94,8 +167,11 @@ def _reset_quiz(total_questions: int):
 
 
 def _current_question_row(questions):
-    idx = st.session_state.quiz_index_order[st.session_state.quiz_pos]
-    return questions[idx]
+    pos = st.session_state.quiz_pos
+    order = st.session_state.quiz_index_order
+    # the next pages load in the background while this question is answered
+    questions.prefetch(max(order[pos:pos + PREFETCH_AHEAD]))
+    return questions[order[pos]]
 
 
 def _options_map(qrow):
@@ -110,6 +186,158 @@ def _options_map(qrow):
     }
 
 
+# ----------------------------
+# MOCK EXAM
+# ----------------------------
+def _clear_exam():
+    st.session_state.exam_order = None  # catalogue positions of the 33 questions
+    st.session_state.exam_general = 0   # how many of them are general questions
+    st.session_state.exam_answers = {}  # exam position -> "A"/"B"/"C"/"D"
+    st.session_state.exam_pos = 0
+    st.session_state.exam_deadline = None
+    st.session_state.exam_result = None
+    st.session_state.exam_version = None
+
+
+def _start_exam(questions, index, state):
+    order = index.sample(state)
+    st.session_state.exam_order = order
+    st.session_state.exam_general = min(EXAM_GENERAL, len(index.general))
+    st.session_state.exam_answers = {}
+    st.session_state.exam_pos = 0
+    st.session_state.exam_deadline = time.time() + EXAM_MINUTES * 60
+    st.session_state.exam_result = None
+    st.session_state.exam_version = questions.version
+
+
+def _submit_exam(questions):
+    order = st.session_state.exam_order
+    answers = st.session_state.exam_answers
+    st.session_state.exam_result = score_exam(questions, order, answers, st.session_state.exam_general)
+
+    # answered questions go to the attempts table like practice answers
+    try:
+        for pos, letter in answers.items():
+            q = questions[order[pos]]
+            _insert_attempt(question_id=q["id"], selected_option=letter, is_correct=(letter == q["correct_option"]))
+        _get_attempt_writer().flush()
+    except Exception as e:
+        st.warning("Exam scored, but saving the attempts failed.")
+        st.code(str(e))
+
+
+def _render_exam_result(questions):
+    general, state, passed = st.session_state.exam_result
+    order = st.session_state.exam_order
+    answers = st.session_state.exam_answers
+    n_general = st.session_state.exam_general
+
+    if passed:
+        st.success(f"✅ Passed: {general + state} of {len(order)} correct (needed: {PASS_MARK}).")
+    else:
+        st.error(f"❌ Not passed: {general + state} of {len(order)} correct (needed: {PASS_MARK}).")
+    st.write(f"General questions: **{general} / {n_general}** · Bundesland questions: **{state} / {len(order) - n_general}**")
+
+    wrong = [pos for pos, i in enumerate(order) if answers.get(pos) != questions[i]["correct_option"]]
+    if wrong:
+        with st.expander(f"Review {len(wrong)} wrong or unanswered questions"):
+            for pos in wrong:
+                q = questions[order[pos]]
+                opts = _options_map(q)
+                chosen = answers.get(pos)
+                st.markdown(f"**{pos + 1}. {q['question']}**")
+                st.markdown(
+                    f"Your answer: {f'{chosen}) {opts[chosen]}' if chosen else '—'} · "
+                    f"Correct: **{q['correct_option']}) {opts[q['correct_option']]}**"
+                )
+
+    if st.button("New mock exam", use_container_width=True):
+        _clear_exam()
+        st.rerun()
+
+
+def _render_exam(questions):
+    # general / per-state positions, built once per catalogue version for all sessions
+    index = get_exam_index(questions, STATES)
+
+    if "exam_order" not in st.session_state or (
+        st.session_state.exam_order is not None and st.session_state.exam_version != questions.version
+    ):
+        _clear_exam()
+
+    # Start screen
+    if st.session_state.exam_order is None:
+        state = remember("exam_state", st.selectbox(
+            "Your Bundesland", STATES, index=remembered_index("exam_state", STATES, STATES[0]), key="exam_state"
+        ))
+        st.write(
+            f"{EXAM_GENERAL} general questions and {EXAM_STATE} about {state}, {EXAM_MINUTES} minutes. "
+            f"You pass with at least {PASS_MARK} correct answers."
+        )
+        if len(index.general) < EXAM_GENERAL or index.state_count(state) < EXAM_STATE:
+            st.info(
+                f"This catalogue has {len(index.general)} general questions and "
+                f"{index.state_count(state)} for {state}; the exam uses what is there."
+            )
+        if st.button("Start mock exam", use_container_width=True, disabled=not len(index.general)):
+            _start_exam(questions, index, state)
+            st.rerun()
+        return
+
+    # Time is checked on every interaction; an expired exam is scored as it is
+    remaining = st.session_state.exam_deadline - time.time()
+    if st.session_state.exam_result is None and remaining <= 0:
+        _submit_exam(questions)
+        st.warning("⏱ Time is up — the exam was submitted.")
+
+    if st.session_state.exam_result is not None:
+        _render_exam_result(questions)
+        return
+
+    order = st.session_state.exam_order
+    answers = st.session_state.exam_answers
+    pos = st.session_state.exam_pos
+
+    # the answer picked in this run is already in the widget state, count it before the radio is drawn
+    picked = st.session_state.get(f"exam_radio_{pos}")
+    if picked is not None:
+        answers[pos] = picked
+
+    minutes, seconds = divmod(int(remaining), 60)
+    st.caption(f"⏱ {minutes}:{seconds:02d} left · {len(answers)} of {len(order)} answered")
+
+    q = questions[order[pos]]
+    opts = _options_map(q)
+
+    st.subheader(f"Question {pos + 1} of {len(order)}")
+    st.write(q["question"])
+
+    letters = ["A", "B", "C", "D"]
+    chosen = st.radio(
+        "Choose one answer:",
+        options=letters,
+        format_func=lambda k: f"{k}) {opts[k]}",
+        index=letters.index(answers[pos]) if pos in answers else None,
+        key=f"exam_radio_{pos}",
+    )
+    if chosen is not None:
+        answers[pos] = chosen
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("Previous", use_container_width=True, disabled=pos == 0):
+            st.session_state.exam_pos -= 1
+            st.rerun()
+    with col2:
+        if st.button("Next", use_container_width=True, disabled=pos + 1 >= len(order)):
+            st.session_state.exam_pos += 1
+            st.rerun()
+    with col3:
+        if st.button("Submit exam", use_container_width=True, type="primary"):
+            _submit_exam(questions)
+            st.rerun()
+
+
 # ----------------------------
 # TAB 8 RENDER (KEEP NAME!)
 # ----------------------------
@@ -120,17 +348,27 @@ def render_tab8():
     st.markdown(f"**Official question catalogue:** {OFFICIAL_QUIZ_CATALOG_URL}")
     st.markdown("---")
 
-    # 1) Fetch questions first (needed to know total)
-    # Fetch questions only once per browser session (speed)
-    if "questions_cache" not in st.session_state:
-        st.session_state.questions_cache = _fetch_questions(limit=200)
-
-    questions = st.session_state.questions_cache
+    # 1) Questions first (needed to know total)
+    # One read-only catalogue per server process, shared by all sessions
+    questions = _get_catalog()
 
+    # anonymous tracking (practice and mock exam)
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = str(uuid.uuid4())
 
+    # kept in session_state (app_common) so another tab does not reset it
+    modes = ["Practice", "Mock exam"]
+    mode = remember("quiz_mode", st.radio(
+        "Mode", modes, index=remembered_index("quiz_mode", modes, "Practice"), horizontal=True, key="quiz_mode"
+    ))
+    if mode == "Mock exam":
+        _render_exam(questions)
+        st.markdown("---")
+        st.caption("No login required. Attempts are stored anonymously using a session_id.")
+        return
 
     # 2) Init state based on DB size
-    _init_quiz_state(total_questions=len(questions))
+    _init_quiz_state(total_questions=len(questions), version=questions.version, block_size=_block_size(questions))
 
     # Top bar: score + controls
     col_a, col_b, col_c = st.columns([2, 1, 1])
@@ -138,11 +376,11 @@ def render_tab8():
         st.metric("Score", f"{st.session_state.quiz_score} / {len(questions)}")
     with col_b:
         if st.button("Restart", use_container_width=True):
-            _reset_quiz(total_questions=len(questions))
+            _reset_quiz(total_questions=len(questions), block_size=_block_size(questions))
             st.rerun()
     with col_c:
         if st.button("Shuffle", use_container_width=True):
-            _reset_quiz(total_questions=len(questions))
+            _reset_quiz(total_questions=len(questions), block_size=_block_size(questions))
             st.rerun()
 
     st.markdown("")
@@ -155,7 +393,12 @@ def render_tab8():
         return
 
     # 3) Current question
-    q = _current_question_row(questions)
+    try:
+        q = _current_question_row(questions)
+    except IndexError:
+        # questions were deleted while the catalogue was loading
+        _reset_quiz(total_questions=len(questions), block_size=_block_size(questions))
+        st.rerun()
     opts = _options_map(q)
 
     st.subheader(f"Question {st.session_state.quiz_pos + 1} of {len(questions)}")
@@ -188,7 +431,7 @@ def render_tab8():
 
             st.session_state.quiz_answered = True
 
-            # Save attempt to Supabase (anonymous)
+            # Queue attempt (anonymous, written in the background)
             try:
                 _insert_attempt(
                     question_id=q["id"],
@@ -196,9 +439,13 @@ def render_tab8():
                     is_correct=is_correct,
                 )
             except Exception as e:
-                st.warning("Answer checked, but saving to Supabase failed.")
+                st.warning("Answer checked, but saving the attempt failed.")
                 st.code(str(e))
 
+            # last question answered: write this quiz's attempts now instead of at the next timer tick
+            if st.session_state.quiz_pos + 1 >= len(questions):
+                _get_attempt_writer().flush()
+
             if is_correct:
                 st.session_state.quiz_score += 1
                 st.session_state.quiz_feedback = "✅ Correct!"
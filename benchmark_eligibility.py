@@ -0,0 +1,321 @@
+# Eligibility inference benchmarks (no Streamlit, no network).
+#
+#   python benchmark_eligibility.py                     # all available paths
+#   python benchmark_eligibility.py --paths bundle --output bench.json
+#
+# Paths:
+#   keras   the original render_tab1 path: TensorFlow load_model + pickled
+#           encoders + pandas preprocessing + model.predict (needs TF,
+#           see requirements-offline.txt)
+#   bundle  the served path: mmapped bundle + CompiledPreprocessor + NumPy
+#
+# For each path: cold start (imports + artifact loading, measured in a fresh
+# subprocess), warm single-row latency split into preprocessing / predict,
+# batch throughput at several batch sizes, and peak RSS of the subprocess.
+# Results go to a JSON file (default cache/benchmark_eligibility.json, not
+# tracked) so runs can be compared between commits.
+#
+# Latency budget: the "why this result?" explanation (eligibility_explain)
+# must stay close to the cost of one prediction. The run exits with status 1
+# when its p50 is above --explain-budget x the single-row p50.
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+PATHS = ("keras", "bundle")
+BATCH_SIZES = (1, 32, 256, 4096)
+EXPLAIN_BUDGET = 5.0  # x single-row prediction; naive per-field predicts would be ~16x
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _summary(samples_s):
+    samples = sorted(samples_s)
+    n = len(samples)
+    return {
+        "n": n,
+        "mean_ms": 1000 * sum(samples) / n,
+        "p50_ms": 1000 * samples[n // 2],
+        "p95_ms": 1000 * samples[min(n - 1, int(n * 0.95))],
+        "min_ms": 1000 * samples[0],
+    }
+
+
+# ============================================================
+# PATH SETUP (runs inside the child process)
+# ============================================================
+
+def _setup_keras():
+    """
+    Returns preprocess(people) -> X, predict(X) -> probs, the category lists,
+    cold-start timings and explain(person) (None when not supported).
+    """
+    timings = {}
+    t0 = time.perf_counter()
+    import pandas as pd
+    from tensorflow.keras.models import load_model
+    timings["import_s"] = time.perf_counter() - t0
+
+    from eligibility_features import RAW_FIELDS, build_feature_matrix, read_feature_columns, read_preprocessors
+
+    t1 = time.perf_counter()
+    model = load_model("models/eligibility_ann.keras")
+    timings["load_model_s"] = time.perf_counter() - t1
+
+    t2 = time.perf_counter()
+    feature_columns = read_feature_columns()
+    scaler, label_encoder, onehot_encoder = read_preprocessors()
+    timings["load_preprocessors_s"] = time.perf_counter() - t2
+    timings["total_s"] = time.perf_counter() - t0
+
+    def preprocess(people):
+        return build_feature_matrix(
+            pd.DataFrame(people)[RAW_FIELDS], feature_columns, scaler, label_encoder, onehot_encoder
+        )
+
+    def predict(X):
+        return model.predict(X, verbose=0)
+
+    categories = (label_encoder.classes_, *onehot_encoder.categories_)
+    return preprocess, predict, categories, timings, None
+
+
+def _setup_bundle():
+    timings = {}
+    t0 = time.perf_counter()
+    from eligibility_bundle import BUNDLE_FILE, load_bundle
+    timings["import_s"] = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    bundle = load_bundle(BUNDLE_FILE)
+    timings["load_bundle_s"] = time.perf_counter() - t1
+    timings["total_s"] = time.perf_counter() - t0
+
+    pre = bundle.preprocessor
+
+    def preprocess(people):
+        if len(people) == 1:
+            return pre.transform_one(people[0])
+        return pre.transform_many(people)
+
+    categories = (
+        pre.language_classes,
+        pre.onehot_categories["nationality"],
+        pre.onehot_categories["resident_permit_type"],
+    )
+
+    from eligibility_explain import explain
+
+    def explain_person(person):
+        return explain(bundle.engine, pre, person)
+
+    return preprocess, bundle.engine.predict, categories, timings, explain_person
+
+
+SETUPS = {"keras": _setup_keras, "bundle": _setup_bundle}
+
+
+# ============================================================
+# MEASUREMENTS
+# ============================================================
+
+def _warm_single_row(preprocess, predict, people, repeats):
+    pre_s, pred_s = [], []
+    for i in range(repeats):
+        person = people[i % len(people)]
+        t0 = time.perf_counter()
+        X = preprocess([person])
+        t1 = time.perf_counter()
+        predict(X)
+        t2 = time.perf_counter()
+        pre_s.append(t1 - t0)
+        pred_s.append(t2 - t1)
+    total = [a + b for a, b in zip(pre_s, pred_s)]
+    return {
+        "preprocess": _summary(pre_s),
+        "predict": _summary(pred_s),
+        "total": _summary(total),
+    }
+
+
+def _explain_latency(explain_person, people, repeats):
+    samples = []
+    for i in range(repeats):
+        t0 = time.perf_counter()
+        explain_person(people[i % len(people)])
+        samples.append(time.perf_counter() - t0)
+    return _summary(samples)
+
+
+def _batch_throughput(preprocess, predict, people, batch_sizes, min_rows, max_time_s=3.0):
+    results = {}
+    for batch_size in batch_sizes:
+        batch = [people[i % len(people)] for i in range(batch_size)]
+        X = preprocess(batch)
+        predict(X)  # warm-up
+
+        # stop at min_rows, or after max_time_s for slow paths (Keras at batch 1)
+        rows = 0
+        t0 = time.perf_counter()
+        elapsed = 0.0
+        while rows < min_rows and (rows == 0 or elapsed < max_time_s):
+            predict(preprocess(batch))
+            rows += batch_size
+            elapsed = time.perf_counter() - t0
+        results[str(batch_size)] = {
+            "rows": rows,
+            "seconds": elapsed,
+            "rows_per_sec": rows / elapsed,
+        }
+    return results
+
+
+def run_child(path_name, repeats, batch_sizes, min_rows):
+    # setup first: the cold-start timings must include the imports
+    preprocess, predict, categories, cold_start, explain_person = SETUPS[path_name]()
+
+    from eligibility_features import random_people
+    people = random_people(512, *categories)
+
+    # first call pays one-time costs (graph tracing in Keras); report it separately
+    t0 = time.perf_counter()
+    predict(preprocess(people[:1]))
+    first_call_s = time.perf_counter() - t0
+
+    result = {
+        "cold_start": cold_start,
+        "first_prediction_s": first_call_s,
+        "warm_single_row": _warm_single_row(preprocess, predict, people, repeats),
+        "batch_throughput": _batch_throughput(preprocess, predict, people, batch_sizes, min_rows),
+    }
+    if explain_person is not None:
+        explain_person(people[0])  # warm-up
+        result["explain"] = _explain_latency(explain_person, people, repeats)
+    result["peak_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def run_path(path_name, repeats, batch_sizes, min_rows):
+    """
+    Runs one path in a fresh interpreter so imports and RSS are not shared.
+    """
+    cmd = [
+        sys.executable, __file__, "--child", path_name,
+        "--repeats", str(repeats),
+        "--batch-sizes", ",".join(str(b) for b in batch_sizes),
+        "--min-rows", str(min_rows),
+    ]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _path_available(path_name):
+    if path_name == "keras":
+        return importlib.util.find_spec("tensorflow") is not None
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark eligibility inference.")
+    parser.add_argument("--paths", default=",".join(PATHS), help=f"comma-separated subset of {PATHS}")
+    parser.add_argument("--repeats", type=int, default=300, help="single-row repetitions (default: 300)")
+    parser.add_argument("--batch-sizes", default=",".join(str(b) for b in BATCH_SIZES))
+    parser.add_argument("--min-rows", type=int, default=20_000, help="rows per batch-size measurement (capped at ~3s)")
+    parser.add_argument("--output", default="cache/benchmark_eligibility.json", help="JSON results file")
+    parser.add_argument("--explain-budget", type=float, default=EXPLAIN_BUDGET,
+                        help=f"max explain p50 / single-row p50 (default: {EXPLAIN_BUDGET})")
+    parser.add_argument("--child", choices=PATHS, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",") if b]
+
+    if args.child:
+        result = run_child(args.child, args.repeats, batch_sizes, args.min_rows)
+        print(json.dumps(result))
+        return
+
+    report = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {
+            "repeats": args.repeats,
+            "batch_sizes": batch_sizes,
+            "min_rows": args.min_rows,
+            "explain_budget": args.explain_budget,
+        },
+        "paths": {},
+    }
+    over_budget = []
+    for path_name in args.paths.split(","):
+        if path_name not in PATHS:
+            parser.error(f"unknown path: {path_name}")
+        if not _path_available(path_name):
+            report["paths"][path_name] = {"skipped": "tensorflow is not installed"}
+            print(f"{path_name}: skipped (tensorflow is not installed)")
+            continue
+
+        print(f"{path_name}: running ...", flush=True)
+        r = run_path(path_name, args.repeats, batch_sizes, args.min_rows)
+        report["paths"][path_name] = r
+        if "error" in r:
+            print(f"{path_name}: failed: {r['error']}")
+            continue
+
+        single = r["warm_single_row"]
+        best = max(r["batch_throughput"].items(), key=lambda kv: kv[1]["rows_per_sec"])
+        print(
+            f"{path_name}: cold start {r['cold_start']['total_s']:.2f}s | "
+            f"single row p50 {single['preprocess']['p50_ms']:.3f} ms preprocess + "
+            f"{single['predict']['p50_ms']:.3f} ms predict | "
+            f"best {best[1]['rows_per_sec']:,.0f} rows/s @ batch {best[0]} | "
+            f"peak RSS {r['peak_rss_mb']:.0f} MB"
+        )
+
+        if "explain" in r:
+            ratio = r["explain"]["p50_ms"] / single["total"]["p50_ms"]
+            r["explain"]["ratio_to_single_row"] = ratio
+            r["explain"]["within_budget"] = ratio <= args.explain_budget
+            print(
+                f"{path_name}: explain p50 {r['explain']['p50_ms']:.3f} ms = {ratio:.1f}x one prediction "
+                f"(budget {args.explain_budget:g}x)"
+            )
+            if ratio > args.explain_budget:
+                over_budget.append(path_name)
+
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results: {args.output}")
+
+    if over_budget:
+        print(f"Explanation latency over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
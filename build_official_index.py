@@ -0,0 +1,240 @@
+# Offline search index over official naturalisation guidance.
+#
+#   python build_official_index.py              # fetch snapshots, then build the index
+#   python build_official_index.py --offline    # rebuild from the snapshots on disk only
+#
+# Sources: ALLOWED_DOMAINS and OFFICIAL_LINKS (official_index.py; the links of
+# the "Official information" tab). Pages are fetched politely (robots.txt, a
+# delay between requests, a page limit per site; links about naturalisation
+# first) and stored as raw HTML under --snapshots with a manifest.json. The
+# index is always built from those snapshots, so changing the text extraction
+# does not need a new crawl.
+#
+# Output: index/official_index.npz + .json (see official_index.py), read by
+# the chatbot's "Official sources" mode.
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from html.parser import HTMLParser
+from urllib.parse import urldefrag, urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from official_index import ALLOWED_DOMAINS, INDEX_PATH, OFFICIAL_LINKS, OfficialIndex, split_passages
+
+SNAPSHOT_DIR = "snapshots/official"
+USER_AGENT = "EinbuergerungHelper-indexer/1.0"
+
+# crawled first, in this order of importance
+TOPIC_WORDS = (
+    "einbuerger", "einbürger", "staatsangehoerig", "staatsangehörig", "naturali",
+    "citizenship", "einbuergerungstest", "leben-in-deutschland", "integration", "sprach",
+)
+SKIP_EXTENSIONS = (".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".zip", ".doc", ".docx", ".xls", ".mp4")
+
+
+# ============================================================
+# HTML -> TEXT
+# ============================================================
+
+class _PageParser(HTMLParser):
+    SKIP = {"script", "style", "noscript", "nav", "header", "footer", "form", "svg", "aside"}
+    BLOCK = {"p", "div", "li", "h1", "h2", "h3", "h4", "h5", "h6", "tr", "br", "section", "article", "dd", "dt"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self.links = []
+        self.parts = []
+        self._skip_depth = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+        if tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        if tag in self.BLOCK:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self.parts.append(data)
+
+
+def parse_html(html):
+    """
+    -> (title, main text, hrefs)
+    """
+    parser = _PageParser()
+    parser.feed(html)
+    lines = (" ".join(line.split()) for line in "".join(parser.parts).splitlines())
+    text = "\n".join(line for line in lines if len(line.split()) >= 3)  # drops menus / button labels
+    return " ".join(parser.title.split()), text, parser.links
+
+
+# ============================================================
+# SNAPSHOTS (polite same-site crawl)
+# ============================================================
+
+def seed_urls():
+    urls = [url for _, url in OFFICIAL_LINKS]
+    hosts = {urlparse(u).hostname.removeprefix("www.") for u in urls}
+    for domain in ALLOWED_DOMAINS:
+        if domain.removeprefix("www.") not in hosts:
+            urls.append(f"https://www.{domain}/")
+    return urls
+
+
+def _priority(url):
+    u = url.lower()
+    return 0 if any(word in u for word in TOPIC_WORDS) else 1
+
+
+def _same_site(url, host):
+    h = urlparse(url).hostname or ""
+    return h.removeprefix("www.") == host.removeprefix("www.")
+
+
+def _robots(client, url):
+    robots = RobotFileParser()
+    parts = urlparse(url)
+    try:
+        r = client.get(f"{parts.scheme}://{parts.netloc}/robots.txt")
+        robots.parse(r.text.splitlines() if r.status_code == 200 else [])
+    except httpx.HTTPError:
+        robots.parse([])
+    return robots
+
+
+def _snapshot_name(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:20] + ".html"
+
+
+def crawl(snapshot_dir, max_pages, delay_s):
+    manifest_path = os.path.join(snapshot_dir, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+
+    headers = {"User-Agent": USER_AGENT}
+    with httpx.Client(headers=headers, follow_redirects=True, timeout=15.0) as client:
+        for seed in seed_urls():
+            host = urlparse(seed).hostname
+            robots = _robots(client, seed)
+            site_dir = os.path.join(snapshot_dir, host)
+            os.makedirs(site_dir, exist_ok=True)
+
+            queue = deque([seed])
+            seen = {seed}
+            fetched = 0
+            while queue and fetched < max_pages:
+                url = queue.popleft()
+                if not robots.can_fetch(USER_AGENT, url):
+                    continue
+                try:
+                    r = client.get(url)
+                except httpx.HTTPError as e:
+                    print(f"  skip {url}: {e}")
+                    continue
+                finally:
+                    time.sleep(delay_s)
+                if r.status_code != 200 or "html" not in r.headers.get("content-type", ""):
+                    continue
+
+                name = os.path.join(host, _snapshot_name(url))
+                with open(os.path.join(snapshot_dir, name), "w", encoding="utf-8") as f:
+                    f.write(r.text)
+                manifest[name] = {"url": str(r.url), "fetched": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+                fetched += 1
+
+                _, _, links = parse_html(r.text)
+                new = []
+                for href in links:
+                    link = urldefrag(urljoin(str(r.url), href))[0]
+                    if (link.startswith("http") and _same_site(link, host) and link not in seen
+                            and not link.lower().endswith(SKIP_EXTENSIONS)):
+                        seen.add(link)
+                        new.append(link)
+                # topic pages jump the queue
+                queue = deque(sorted([*queue, *new], key=_priority))
+
+            print(f"{host}: {fetched} pages")
+
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+# ============================================================
+# SNAPSHOTS -> PASSAGES -> INDEX
+# ============================================================
+
+def load_passages(snapshot_dir):
+    with open(os.path.join(snapshot_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    passages, seen_text = [], set()
+    for name, info in sorted(manifest.items()):
+        path = os.path.join(snapshot_dir, name)
+        if not os.path.exists(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            title, text, _ = parse_html(f.read())
+        for passage in split_passages(text):
+            digest = hashlib.sha256(passage.encode("utf-8")).digest()
+            if digest in seen_text:  # same boilerplate on many pages
+                continue
+            seen_text.add(digest)
+            passages.append({"url": info["url"], "title": title or info["url"], "text": passage})
+    return passages, len(manifest)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the offline index over official guidance.")
+    parser.add_argument("--snapshots", default=SNAPSHOT_DIR, help=f"snapshot directory (default: {SNAPSHOT_DIR})")
+    parser.add_argument("--output", default=INDEX_PATH, help=f"index path without extension (default: {INDEX_PATH})")
+    parser.add_argument("--offline", action="store_true", help="do not fetch, index the existing snapshots")
+    parser.add_argument("--max-pages", type=int, default=40, help="pages per site (default: 40)")
+    parser.add_argument("--delay", type=float, default=1.0, help="seconds between requests (default: 1.0)")
+    args = parser.parse_args(argv)
+
+    if not args.offline:
+        crawl(args.snapshots, args.max_pages, args.delay)
+
+    t0 = time.perf_counter()
+    passages, n_pages = load_passages(args.snapshots)
+    if not passages:
+        raise SystemExit(f"No text found in {args.snapshots}")
+
+    index = OfficialIndex.build(passages, metadata={"pages": n_pages, "snapshots": args.snapshots})
+    index.save(args.output)
+    print(
+        f"Indexed {len(passages)} passages from {n_pages} pages, {len(index.vocab)} terms "
+        f"in {time.perf_counter() - t0:.1f}s -> {args.output}.npz/.json"
+    )
+
+
+if __name__ == "__main__":
+    main()
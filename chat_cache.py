@@ -0,0 +1,170 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+DEFAULT_PATH = "cache/chat_answers.sqlite3"
+DEFAULT_MAX_ENTRIES = 5000
+
+# browse answers quote live websites -> they go stale sooner
+DEFAULT_TTL_S = {
+    "fast": 7 * 24 * 3600,
+    "official": 24 * 3600,
+}
+
+
+def normalize_question(question):
+    """
+    "How many YEARS do I need??" and "how many years do i need" -> same key.
+    """
+    q = unicodedata.normalize("NFKC", question).casefold()
+    q = re.sub(r"[^\w\s]", " ", q)
+    return " ".join(q.split())
+
+
+# ============================================================
+# PERSISTENT ANSWER CACHE (SQLite on local disk)
+# ============================================================
+
+class AnswerCache:
+    """
+    (provider, mode, normalized question) -> answer, shared by all
+    sessions and worker processes on this machine.
+
+    Entries expire after a per-mode TTL; the table is kept at max_entries
+    by dropping the least recently used rows.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl_s=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_s = dict(DEFAULT_TTL_S, **(ttl_s or {}))
+        self.max_entries = max_entries
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")  # readers do not block the writer
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key        TEXT PRIMARY KEY,
+                provider   TEXT NOT NULL,
+                mode       TEXT NOT NULL,
+                question   TEXT NOT NULL,
+                answer     TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used  REAL NOT NULL,
+                hits       INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+        # counters for this process
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(provider, mode, question):
+        raw = f"{provider}\x1f{mode}\x1f{normalize_question(question)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, provider, mode, question):
+        key = self.make_key(provider, mode, question)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT answer, created_at FROM answers WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            answer, created_at = row
+            if now - created_at > self.ttl_s.get(mode, DEFAULT_TTL_S["official"]):
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self._conn.commit()
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE answers SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return answer
+
+    def put(self, provider, mode, question, answer):
+        key = self.make_key(provider, mode, question)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO answers
+                    (key, provider, mode, question, answer, created_at, last_used, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, provider, mode, normalize_question(question), answer, now, now),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+            if count > self.max_entries:
+                cur = self._conn.execute(
+                    "DELETE FROM answers WHERE key IN "
+                    "(SELECT key FROM answers ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self.evictions += cur.rowcount
+            self._conn.commit()
+            self.stores += 1
+
+    def stats(self):
+        with self._lock:
+            (size,) = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "size": size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_answer_cache(path=DEFAULT_PATH, ttl_s=None, max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    One AnswerCache per file in this process; new ttl_s / max_entries
+    apply to the existing cache (a lower max_entries on its next put).
+    """
+    cache = _caches.get(path)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(path)
+            if cache is None:
+                cache = AnswerCache(path, ttl_s, max_entries)
+                _caches[path] = cache
+    cache.ttl_s = dict(DEFAULT_TTL_S, **(ttl_s or {}))
+    cache.max_entries = max_entries
+    return cache
+
+
+def answer_cache_stats():
+    """
+    {path: stats} for the caches opened in this process (none -> {}).
+    """
+    return {path: cache.stats() for path, cache in list(_caches.items())}
@@ -0,0 +1,140 @@
+import threading
+
+DEFAULT_CONTEXT_TOKENS = 1200   # summary + verbatim history sent with each question
+DEFAULT_SUMMARY_TOKENS = 250    # target length of the running summary
+MESSAGE_OVERHEAD_TOKENS = 4     # role / separators per message
+
+
+def estimate_tokens(text):
+    """
+    ~4 characters per token (English / German prose); close enough for a
+    budget, and free compared to running a tokenizer on every turn.
+    """
+    return len(text) // 4 + 1
+
+
+def transcript(messages):
+    return "\n".join(f"{m['role'].capitalize()}: {m['content']}" for m in messages)
+
+
+def to_messages(summary, recent):
+    """
+    Chat-API messages for the context (the system prompt and the new
+    question are added by the caller).
+    """
+    out = []
+    if summary:
+        out.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+    out.extend({"role": m["role"], "content": m["content"]} for m in recent)
+    return out
+
+
+def to_prompt(summary, recent):
+    """
+    The same context as plain text, for single-prompt APIs (Gemini).
+    """
+    parts = []
+    if summary:
+        parts.append(f"Summary of the earlier conversation:\n{summary}")
+    if recent:
+        parts.append(f"Recent messages:\n{transcript(recent)}")
+    return "\n\n".join(parts)
+
+
+# ============================================================
+# RUNNING SUMMARY (one per chat session)
+# ============================================================
+
+class ConversationMemory:
+    """
+    Keeps the prompt context of one conversation within a token budget:
+    the newest messages verbatim, everything before them as a running
+    summary.
+
+    The summary is updated incrementally (old summary + the messages that
+    just left the verbatim window) in a background thread after an answer,
+    so no question waits for it. Until an update lands, messages that no
+    longer fit are left out rather than blowing the budget.
+    """
+
+    def __init__(self):
+        self.summary = ""
+        self.summarized = 0  # chat[:summarized] is folded into the summary
+        self.updates = 0
+        self.failures = 0
+        self._updating = False
+        self._lock = threading.Lock()
+
+    def build(self, chat, budget_tokens=DEFAULT_CONTEXT_TOKENS):
+        """
+        -> (summary, recent messages) fitting in budget_tokens together.
+        The newest message is always kept, cut down if it alone is too long.
+        """
+        with self._lock:
+            summary, summarized = self.summary, self.summarized
+
+        remaining = budget_tokens - estimate_tokens(summary)
+        recent = []
+        for message in reversed(chat[summarized:]):
+            cost = estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+            if cost > remaining:
+                if not recent and remaining > MESSAGE_OVERHEAD_TOKENS:
+                    keep_chars = 4 * (remaining - MESSAGE_OVERHEAD_TOKENS)
+                    recent.append({"role": message["role"], "content": "…" + message["content"][-keep_chars:]})
+                break
+            recent.append(message)
+            remaining -= cost
+        recent.reverse()
+        return summary, recent
+
+    def maybe_update(self, chat, plan, budget_tokens=DEFAULT_CONTEXT_TOKENS):
+        """
+        Folds the messages that no longer fit verbatim into the summary.
+
+        plan(old_summary, messages) is called here (the session thread) and
+        returns job() -> new summary, which runs in a background thread.
+        Returns True if an update was started (at most one at a time).
+        """
+        _, recent = self.build(chat, budget_tokens)
+        upto = len(chat) - len(recent)
+        with self._lock:
+            if self._updating or upto <= self.summarized:
+                return False
+            self._updating = True
+            old_summary, start = self.summary, self.summarized
+
+        messages = [dict(m) for m in chat[start:upto]]
+        try:
+            job = plan(old_summary, messages)
+        except Exception:
+            with self._lock:
+                self._updating = False
+                self.failures += 1
+            raise
+
+        def run():
+            try:
+                summary = job()
+            except Exception:
+                summary = None
+            with self._lock:
+                if summary:
+                    self.summary = summary
+                    self.summarized = upto
+                    self.updates += 1
+                else:
+                    self.failures += 1  # keep the old summary, retried after the next answer
+                self._updating = False
+
+        threading.Thread(target=run, name="chat-summary", daemon=True).start()
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "summary_tokens": estimate_tokens(self.summary) if self.summary else 0,
+                "summarized_messages": self.summarized,
+                "updates": self.updates,
+                "failures": self.failures,
+                "updating": self._updating,
+            }
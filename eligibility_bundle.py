@@ -0,0 +1,224 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+
+from eligibility_engine import NumpyANN
+from eligibility_features import ONEHOT_FIELDS, CompiledPreprocessor
+
+BUNDLE_FILE = "models/eligibility_bundle.bin"
+
+# reduced-precision variants written by quantize_eligibility_model.py
+BUNDLE_FILES = {
+    "float32": BUNDLE_FILE,
+    "float16": "models/eligibility_bundle_float16.bin",
+    "int8": "models/eligibility_bundle_int8.bin",
+}
+
+# ============================================================
+# FILE FORMAT
+# ============================================================
+#   8 bytes   magic  b"EINBUNDL"
+#   4 bytes   format version (uint32, little endian)
+#   4 bytes   header length  (uint32, little endian)
+#   N bytes   header (UTF-8 JSON): metadata + array table + sha256 of data
+#   ...       zero padding, then every array at a 64-byte aligned offset
+#
+# Arrays are read with np.frombuffer on a read-only mmap, so every worker
+# process shares the same page-cache pages and nothing is unpickled.
+
+MAGIC = b"EINBUNDL"
+FORMAT_VERSION = 2  # 2: float16 / int8 kernels + per-unit kernel scales
+READABLE_VERSIONS = (1, 2)
+ALIGN = 64
+_PREAMBLE = struct.Struct("<8sII")
+
+
+class BundleError(ValueError):
+    pass
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_bundle(path, layers, feature_columns, mean, scale, language_classes,
+                 onehot_categories, ignore_unknown=True, metadata=None):
+    """
+    layers: list of (kernel, bias, activation_name[, kernel_scale]) like
+    NumpyANN; float16 / int8 kernels are stored as they are.
+    onehot_categories: one list of categories per field in ONEHOT_FIELDS.
+    """
+    arrays = {
+        "scaler_mean": np.asarray(mean, dtype="<f8"),
+        "scaler_scale": np.asarray(scale, dtype="<f8"),
+    }
+    layer_table = []
+    for i, layer in enumerate(layers):
+        kernel, bias, activation = layer[:3]
+        kernel_scale = layer[3] if len(layer) > 3 else None
+
+        kernel = np.asarray(kernel)
+        kernel_dtype = kernel.dtype.newbyteorder("<") if kernel.dtype in (np.float16, np.int8) else "<f4"
+        arrays[f"kernel_{i}"] = np.ascontiguousarray(kernel, dtype=kernel_dtype)
+        arrays[f"bias_{i}"] = np.ascontiguousarray(bias, dtype="<f4")
+        entry = {"kernel": f"kernel_{i}", "bias": f"bias_{i}", "activation": activation}
+        if kernel_scale is not None:
+            arrays[f"kernel_scale_{i}"] = np.ascontiguousarray(kernel_scale, dtype="<f4")
+            entry["kernel_scale"] = f"kernel_scale_{i}"
+        layer_table.append(entry)
+
+    # data section layout (offsets relative to the start of the data section)
+    array_table = {}
+    offset = 0
+    for name, arr in arrays.items():
+        offset = _align(offset)
+        array_table[name] = {
+            "dtype": arr.dtype.str,
+            "shape": list(arr.shape),
+            "offset": offset,
+            "nbytes": arr.nbytes,
+        }
+        offset += arr.nbytes
+    data = bytearray(offset)
+    for name, arr in arrays.items():
+        start = array_table[name]["offset"]
+        data[start:start + arr.nbytes] = arr.tobytes()
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "precision": str(arrays["kernel_0"].dtype) if layers else "float32",
+        "feature_columns": [str(c) for c in feature_columns],
+        "language_classes": [str(c) for c in language_classes],
+        "onehot_categories": {
+            field: [str(c) for c in cats] for field, cats in zip(ONEHOT_FIELDS, onehot_categories)
+        },
+        "ignore_unknown": bool(ignore_unknown),
+        "layers": layer_table,
+        "arrays": array_table,
+        "data_sha256": hashlib.sha256(data).hexdigest(),
+        "metadata": metadata or {},
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, indent=1).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header_bytes))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_start - _PREAMBLE.size - len(header_bytes)))
+        f.write(data)
+    os.replace(tmp_path, path)  # readers never see a half-written bundle
+    return header
+
+
+# ============================================================
+# LOADER
+# ============================================================
+
+class EligibilityBundle:
+    """
+    Everything the eligibility tab needs, from one mmapped file:
+      .engine        NumpyANN (weights are read-only views into the mmap)
+      .preprocessor  CompiledPreprocessor
+      .feature_columns, .precision, .version, .metadata
+    """
+
+    def __init__(self, path, mm, header, arrays):
+        self.path = path
+        self.header = header
+        self.version = header["data_sha256"][:12]
+        self.metadata = header.get("metadata", {})
+        self.precision = header.get("precision", "float32")
+        self.feature_columns = header["feature_columns"]
+        self.arrays = arrays
+        self._mm = mm  # keeps the mapping alive for the array views
+
+        self.engine = NumpyANN([
+            (
+                arrays[layer["kernel"]],
+                arrays[layer["bias"]],
+                layer["activation"],
+                arrays[layer["kernel_scale"]] if "kernel_scale" in layer else None,
+            )
+            for layer in header["layers"]
+        ])
+        self.preprocessor = CompiledPreprocessor(
+            self.feature_columns,
+            arrays["scaler_mean"],
+            arrays["scaler_scale"],
+            header["language_classes"],
+            [header["onehot_categories"][field] for field in ONEHOT_FIELDS],
+            ignore_unknown=header["ignore_unknown"],
+        )
+
+
+def load_bundle(path=BUNDLE_FILE, verify=True):
+    """
+    mmap + parse a bundle. Raises BundleError on a wrong magic/version,
+    a truncated file or (verify=True) a checksum mismatch.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mm) < _PREAMBLE.size:
+        raise BundleError(f"{path}: file too small to be a bundle")
+    magic, version, header_len = _PREAMBLE.unpack_from(mm, 0)
+    if magic != MAGIC:
+        raise BundleError(f"{path}: not an eligibility bundle")
+    if version not in READABLE_VERSIONS:
+        raise BundleError(f"{path}: bundle format {version}, this code reads {READABLE_VERSIONS}")
+
+    header = json.loads(bytes(mm[_PREAMBLE.size:_PREAMBLE.size + header_len]).decode("utf-8"))
+    data_start = _align(_PREAMBLE.size + header_len)
+    data_len = max(
+        (spec["offset"] + spec["nbytes"] for spec in header["arrays"].values()), default=0
+    )
+    if len(mm) < data_start + data_len:
+        raise BundleError(f"{path}: truncated bundle")
+
+    if verify:
+        digest = hashlib.sha256(mm[data_start:data_start + data_len]).hexdigest()
+        if digest != header["data_sha256"]:
+            raise BundleError(f"{path}: checksum mismatch (file is corrupt)")
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        arr = np.frombuffer(
+            mm, dtype=dtype, count=spec["nbytes"] // dtype.itemsize, offset=data_start + spec["offset"]
+        )
+        arrays[name] = arr.reshape(spec["shape"])
+
+    return EligibilityBundle(path, mm, header, arrays)
+
+
+# ============================================================
+# PROCESS-WIDE SHARED INSTANCE (used by every tab)
+# ============================================================
+
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+
+def get_bundle(path=BUNDLE_FILE):
+    """
+    Cached load_bundle(). Reloads when the file on disk is replaced.
+    """
+    st_ = os.stat(path)
+    signature = (st_.st_size, st_.st_mtime_ns, st_.st_ino)
+
+    cached = _bundles.get(path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+
+    with _bundles_lock:
+        cached = _bundles.get(path)
+        if cached is None or cached[0] != signature:
+            cached = (signature, load_bundle(path))
+            _bundles[path] = cached
+    return cached[1]
@@ -0,0 +1,159 @@
+import numpy as np
+
+WEIGHTS_FILE = "models/eligibility_ann_weights.npz"
+
+
+# ============================================================
+# ACTIVATIONS (same names Keras stores in the layer config)
+# ============================================================
+
+def _linear(x):
+    return x
+
+
+def _relu(x):
+    return np.maximum(x, 0.0, out=x)
+
+
+def _sigmoid(x):
+    # numerically stable: never calls exp() on a large positive number
+    out = np.empty_like(x)
+    pos = x >= 0
+    out[pos] = 1.0 / (1.0 + np.exp(-x[pos]))
+    ex = np.exp(x[~pos])
+    out[~pos] = ex / (1.0 + ex)
+    return out
+
+
+def _tanh(x):
+    return np.tanh(x, out=x)
+
+
+ACTIVATIONS = {
+    "linear": _linear,
+    "relu": _relu,
+    "sigmoid": _sigmoid,
+    "tanh": _tanh,
+}
+
+
+# ============================================================
+# FORWARD-PASS ENGINE
+# ============================================================
+
+PRECISIONS = ("float32", "float16", "int8")
+
+
+class NumpyANN:
+    """
+    Forward pass of a stack of Dense layers in plain NumPy.
+
+    layers: list of (kernel, bias, activation_name) or
+            (kernel, bias, activation_name, kernel_scale) for int8 kernels
+            (per output unit: W ~= kernel * kernel_scale).
+    float16 / int8 kernels stay in their storage dtype; the matmul
+    promotes them to float32.
+    predict() has the same shape contract as keras Model.predict:
+    (n_rows, n_features) in -> (n_rows, n_units_last) out.
+    """
+
+    def __init__(self, layers):
+        self.layers = []
+        for layer in layers:
+            kernel, bias, activation = layer[:3]
+            kernel_scale = layer[3] if len(layer) > 3 else None
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Unsupported activation: {activation}")
+
+            kernel = np.asarray(kernel)
+            if kernel.dtype not in (np.float16, np.int8):
+                kernel = kernel.astype(np.float32, copy=False)
+            if kernel.dtype == np.int8 and kernel_scale is None:
+                raise ValueError("int8 kernel needs a kernel_scale")
+            if kernel_scale is not None:
+                kernel_scale = np.asarray(kernel_scale, dtype=np.float32)
+
+            self.layers.append((
+                kernel,
+                np.asarray(bias, dtype=np.float32),
+                activation,
+                kernel_scale,
+            ))
+
+    @property
+    def n_features(self):
+        return self.layers[0][0].shape[0]
+
+    @property
+    def precision(self):
+        return str(self.layers[0][0].dtype)
+
+    @property
+    def weight_bytes(self):
+        return sum(
+            k.nbytes + b.nbytes + (s.nbytes if s is not None else 0)
+            for k, b, _, s in self.layers
+        )
+
+    def predict(self, X):
+        h = np.asarray(X, dtype=np.float32)
+        if h.ndim == 1:
+            h = h.reshape(1, -1)
+        for kernel, bias, activation, kernel_scale in self.layers:
+            h = np.matmul(h, kernel, dtype=np.float32)
+            if kernel_scale is not None:
+                h *= kernel_scale
+            h += bias
+            h = ACTIVATIONS[activation](h)
+        return h
+
+
+# ============================================================
+# REDUCED PRECISION
+# ============================================================
+
+def quantize_layers(layers, precision):
+    """
+    float32 layers -> same layers with float16 or int8 kernels.
+    int8 is symmetric per output unit: scale = max|W[:, j]| / 127.
+    Biases stay float32 (a few dozen numbers).
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision!r} (use one of {PRECISIONS})")
+
+    quantized = []
+    for layer in layers:
+        kernel, bias, activation = layer[:3]
+        kernel = np.asarray(kernel, dtype=np.float32)
+        if precision == "float32":
+            quantized.append((kernel, bias, activation))
+        elif precision == "float16":
+            quantized.append((kernel.astype(np.float16), bias, activation))
+        else:
+            max_abs = np.max(np.abs(kernel), axis=0)
+            scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+            q = np.clip(np.rint(kernel / scale), -127, 127).astype(np.int8)
+            quantized.append((q, bias, activation, scale))
+    return quantized
+
+
+# ============================================================
+# BUNDLE I/O (plain arrays, no pickle)
+# ============================================================
+
+def save_weights(path, layers):
+    arrays = {"n_layers": np.array(len(layers))}
+    for i, (kernel, bias, activation) in enumerate(layer[:3] for layer in layers):
+        arrays[f"kernel_{i}"] = np.asarray(kernel, dtype=np.float32)
+        arrays[f"bias_{i}"] = np.asarray(bias, dtype=np.float32)
+        arrays[f"activation_{i}"] = np.array(activation)
+    np.savez(path, **arrays)
+
+
+def load_engine(path=WEIGHTS_FILE):
+    with np.load(path, allow_pickle=False) as data:
+        layers = [
+            (data[f"kernel_{i}"], data[f"bias_{i}"], str(data[f"activation_{i}"]))
+            for i in range(int(data["n_layers"]))
+        ]
+    return NumpyANN(layers)
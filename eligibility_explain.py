@@ -0,0 +1,41 @@
+import numpy as np
+
+from eligibility_features import RAW_FIELDS
+
+# ============================================================
+# "WHY THIS RESULT?" (occlusion attributions, one forward pass)
+# ============================================================
+# For each of the 15 raw fields, the model columns of that field are set
+# to the training average (0 after StandardScaler) while everything else
+# stays as entered. attribution = p(person) - p(person with that field
+# averaged): positive = this field pushes the prediction towards eligible.
+#
+# The original row and all 15 perturbed rows go through the model as one
+# (16, n_features) batch, so an explanation costs about one prediction.
+
+
+def explanation_batch(X_row, field_columns, fields=RAW_FIELDS):
+    """
+    X_row: (n_features,) scaled feature vector.
+    Returns a (1 + len(fields), n_features) batch: row 0 = X_row,
+    row i + 1 = X_row with fields[i] set to the training average.
+    """
+    X_row = np.asarray(X_row, dtype=np.float32).reshape(-1)
+    batch = np.empty((1 + len(fields), X_row.shape[0]), dtype=np.float32)
+    batch[:] = X_row
+    for i, field in enumerate(fields, start=1):
+        batch[i, field_columns[field]] = 0.0
+    return batch
+
+
+def explain(model, preprocessor, person, fields=RAW_FIELDS):
+    """
+    Returns (probability, [(field, attribution), ...]) sorted by |attribution|.
+    """
+    X_row = preprocessor.transform_one(person)[0]
+    probs = model.predict(explanation_batch(X_row, preprocessor.field_columns, fields))[:, 0]
+
+    prob = float(probs[0])
+    attributions = [(field, prob - float(p)) for field, p in zip(fields, probs[1:])]
+    attributions.sort(key=lambda fa: abs(fa[1]), reverse=True)
+    return prob, attributions
@@ -0,0 +1,362 @@
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+
+# The 15 raw fields collected by the eligibility form (see render_tab1)
+NUMERIC_FIELDS = [
+    "years_in_germany",
+    "age",
+    "monthly_income_eur",
+    "has_integration_course",
+    "passed_naturalisation_test",
+    "has_criminal_record",
+    "has_permanent_residence",
+    "financial_independent",
+    "married_to_german",
+    "children_in_germany",
+    "months_tax_paid_last_12",
+    "currently_paying_taxes",
+]
+LABEL_FIELD = "language_level"
+ONEHOT_FIELDS = ["nationality", "resident_permit_type"]
+
+RAW_FIELDS = NUMERIC_FIELDS + [LABEL_FIELD] + ONEHOT_FIELDS
+
+FIELD_LABELS = {
+    "years_in_germany": "Years in Germany",
+    "age": "Age",
+    "monthly_income_eur": "Monthly income (EUR)",
+    "has_integration_course": "Integration course",
+    "passed_naturalisation_test": "Naturalisation test",
+    "has_criminal_record": "Criminal record",
+    "has_permanent_residence": "Permanent residence",
+    "financial_independent": "Financially independent",
+    "married_to_german": "Married to German citizen",
+    "children_in_germany": "Children in Germany",
+    "months_tax_paid_last_12": "Months of tax paid (last 12)",
+    "currently_paying_taxes": "Currently paying taxes",
+    "language_level": "Language level",
+    "nationality": "Nationality",
+    "resident_permit_type": "Resident permit type",
+}
+
+
+# ============================================================
+# ARTIFACT LOADERS (plain, no Streamlit caching)
+# ============================================================
+
+def read_feature_columns(path="models/eligibility_feature_columns.pkl"):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def read_preprocessors(models_dir="models"):
+    with open(f"{models_dir}/eligibility_scaler.pkl", "rb") as f:
+        scaler = pickle.load(f)
+    with open(f"{models_dir}/eligibility_label_encoder.pkl", "rb") as f:
+        label_encoder = pickle.load(f)
+    with open(f"{models_dir}/eligibility_onehot_encoder.pkl", "rb") as f:
+        onehot_encoder = pickle.load(f)
+    return scaler, label_encoder, onehot_encoder
+
+
+# ============================================================
+# PANDAS PREPROCESSING (works for 1 row or a whole chunk)
+# ============================================================
+
+def encode_raw_frame(raw_df, label_encoder, onehot_encoder):
+    """
+    Raw fields -> model columns (unordered, unscaled):
+      language_level -> language_level_encoded
+      nationality / resident_permit_type -> one-hot columns
+    """
+    raw_df = raw_df.reset_index(drop=True)
+
+    # 1) Encode language_level -> language_level_encoded
+    raw_df["language_level_encoded"] = label_encoder.transform(
+        raw_df[LABEL_FIELD]
+    )
+
+    # 2) One-hot encode nationality + resident_permit_type
+    ohe_array = onehot_encoder.transform(raw_df[ONEHOT_FIELDS])
+    ohe_cols = onehot_encoder.get_feature_names_out(ONEHOT_FIELDS)
+    ohe_df = pd.DataFrame(ohe_array, columns=ohe_cols)
+
+    # 3) Combine and drop original categorical columns
+    full_df = pd.concat([raw_df, ohe_df], axis=1)
+    return full_df.drop(columns=ONEHOT_FIELDS + [LABEL_FIELD])
+
+
+def build_feature_matrix(raw_df, feature_columns, scaler, label_encoder, onehot_encoder):
+    """
+    Raw fields -> scaled model input, ordered like feature_columns.
+    Raises ValueError if the encoded frame is missing a training column.
+    """
+    full_df = encode_raw_frame(raw_df, label_encoder, onehot_encoder)
+
+    missing_cols = set(feature_columns) - set(full_df.columns)
+    if missing_cols:
+        raise ValueError(f"Missing columns in input: {sorted(missing_cols)}")
+
+    X_scaled = scaler.transform(full_df[feature_columns])
+    return np.asarray(X_scaled, dtype=np.float32)
+
+
+# ============================================================
+# COMPILED PREPROCESSING (no pandas per request)
+# ============================================================
+
+class CompiledPreprocessor:
+    """
+    Same output as build_feature_matrix, without the pandas round trip.
+
+    Everything that does not depend on the person (column positions,
+    one-hot offsets, scaler mean/scale) is computed once here. A request
+    then only writes ~15 floats into a preallocated float32 row.
+    """
+
+    def __init__(self, feature_columns, mean, scale, language_classes, onehot_categories,
+                 ignore_unknown=True):
+        self.feature_columns = list(feature_columns)
+        col_index = {name: i for i, name in enumerate(self.feature_columns)}
+
+        self.language_classes = [str(c) for c in language_classes]
+        self.onehot_categories = {
+            field: [str(c) for c in cats] for field, cats in zip(ONEHOT_FIELDS, onehot_categories)
+        }
+        self.ignore_unknown = ignore_unknown
+
+        expected = NUMERIC_FIELDS + ["language_level_encoded"] + [
+            f"{field}_{cat}" for field, cats in self.onehot_categories.items() for cat in cats
+        ]
+        missing_cols = set(self.feature_columns) - set(expected)
+        if missing_cols:
+            raise ValueError(f"Missing columns in input: {sorted(missing_cols)}")
+
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        self.mean = mean
+        self.scale = scale
+
+        # numeric fields: (field, column index, mean, scale)
+        self._numeric = [
+            (field, col_index[field], float(mean[col_index[field]]), float(scale[col_index[field]]))
+            for field in NUMERIC_FIELDS
+        ]
+
+        # language level: label index -> already scaled value
+        lang_col = col_index["language_level_encoded"]
+        self._lang_col = lang_col
+        self._lang_value = {
+            level: (code - mean[lang_col]) / scale[lang_col]
+            for code, level in enumerate(self.language_classes)
+        }
+
+        # one-hot: category -> (column index, scaled value of a 1)
+        self._onehot = {}
+        for field, cats in self.onehot_categories.items():
+            lookup = {}
+            for cat in cats:
+                col = col_index.get(f"{field}_{cat}")
+                if col is not None:
+                    lookup[cat] = (col, (1.0 - mean[col]) / scale[col])
+            self._onehot[field] = lookup
+
+        # every column at raw value 0 -> the starting point of each row
+        self._zero_row = ((0.0 - mean) / scale).astype(np.float32)
+
+        # raw field -> model columns it feeds (one-hot fields feed several)
+        self.field_columns = {field: [col] for field, col, _, _ in self._numeric}
+        self.field_columns[LABEL_FIELD] = [lang_col]
+        for field, lookup in self._onehot.items():
+            self.field_columns[field] = [col for col, _ in lookup.values()]
+
+        self._local = threading.local()
+
+    @classmethod
+    def from_artifacts(cls, feature_columns, scaler, label_encoder, onehot_encoder):
+        mean = scaler.mean_ if scaler.mean_ is not None else np.zeros(len(feature_columns))
+        scale = scaler.scale_ if scaler.scale_ is not None else np.ones(len(feature_columns))
+        return cls(
+            feature_columns,
+            mean,
+            scale,
+            label_encoder.classes_,
+            onehot_encoder.categories_,
+            ignore_unknown=(onehot_encoder.handle_unknown != "error"),
+        )
+
+    @property
+    def n_features(self):
+        return len(self.feature_columns)
+
+    def _buffer(self, n_rows):
+        # one buffer per thread: Streamlit sessions share this object
+        buf = getattr(self._local, "buf", None)
+        if buf is None or buf.shape[0] < n_rows:
+            buf = np.empty((n_rows, self.n_features), dtype=np.float32)
+            self._local.buf = buf
+        return buf[:n_rows]
+
+    def _write_row(self, row, person):
+        row[:] = self._zero_row
+
+        for field, col, mean, scale in self._numeric:
+            row[col] = (float(person[field]) - mean) / scale
+
+        level = person[LABEL_FIELD]
+        try:
+            row[self._lang_col] = self._lang_value[level]
+        except KeyError:
+            raise ValueError(f"Unknown language level: {level!r}") from None
+
+        for field, lookup in self._onehot.items():
+            hit = lookup.get(person[field])
+            if hit is not None:
+                col, value = hit
+                row[col] = value
+            elif not self.ignore_unknown:
+                raise ValueError(f"Unknown {field}: {person[field]!r}")
+
+    def transform_one(self, person):
+        """
+        person: dict with the 15 raw fields (like example_person).
+        Returns a (1, n_features) float32 view into a reused per-thread
+        buffer -> copy it if you need to keep it past the next call.
+        """
+        buf = self._buffer(1)
+        self._write_row(buf[0], person)
+        return buf
+
+    def transform_many(self, people):
+        """
+        people: list of dicts. Returns a new (n, n_features) float32 array.
+        """
+        X = np.empty((len(people), self.n_features), dtype=np.float32)
+        for row, person in zip(X, people):
+            self._write_row(row, person)
+        return X
+
+    def transform_frame(self, df):
+        """
+        Vectorized version for a DataFrame with the raw fields as columns
+        (batch scoring). Returns a new (len(df), n_features) float32 array.
+        """
+        X = np.empty((len(df), self.n_features), dtype=np.float32)
+        X[:] = self._zero_row
+
+        for field, col, mean, scale in self._numeric:
+            X[:, col] = (df[field].to_numpy(dtype=np.float64) - mean) / scale
+
+        lang_values = df[LABEL_FIELD].map(self._lang_value)
+        if lang_values.isna().any():
+            unknown = sorted(set(df.loc[lang_values.isna(), LABEL_FIELD].astype(str)))
+            raise ValueError(f"Unknown language level(s): {unknown}")
+        X[:, self._lang_col] = lang_values.to_numpy(dtype=np.float64)
+
+        for field, lookup in self._onehot.items():
+            categories = list(lookup)
+            codes = pd.Categorical(df[field], categories=categories).codes  # -1 = unknown
+            if not self.ignore_unknown and (codes < 0).any():
+                raise ValueError(f"Unknown {field} value(s) in input")
+            cols = np.array([lookup[c][0] for c in categories])
+            values = np.array([lookup[c][1] for c in categories])
+            rows = np.flatnonzero(codes >= 0)
+            X[rows, cols[codes[rows]]] = values[codes[rows]]
+        return X
+
+    def transform_sweep(self, person, field, values):
+        """
+        One row per value of `field`, everything else taken from person.
+        Built as a single (len(values), n_features) float32 batch: the base
+        row is encoded once and only the swept column(s) differ.
+        """
+        X = np.empty((len(values), self.n_features), dtype=np.float32)
+        self._write_row(X[0], person)
+        X[1:] = X[0]
+
+        numeric = {f: (col, mean, scale) for f, col, mean, scale in self._numeric}
+        if field in numeric:
+            col, mean, scale = numeric[field]
+            X[:, col] = (np.asarray(values, dtype=np.float64) - mean) / scale
+        elif field == LABEL_FIELD:
+            try:
+                X[:, self._lang_col] = [self._lang_value[v] for v in values]
+            except KeyError as e:
+                raise ValueError(f"Unknown language level: {e.args[0]!r}") from None
+        elif field in self._onehot:
+            lookup = self._onehot[field]
+            cols = [col for col, _ in lookup.values()]
+            X[:, cols] = self._zero_row[cols]
+            for i, value in enumerate(values):
+                hit = lookup.get(value)
+                if hit is not None:
+                    X[i, hit[0]] = hit[1]
+                elif not self.ignore_unknown:
+                    raise ValueError(f"Unknown {field}: {value!r}")
+        else:
+            raise ValueError(f"Unknown field: {field!r}")
+        return X
+
+
+def random_people(n, language_classes, nat_categories, permit_categories, seed=0):
+    """
+    n synthetic applicants (list of dicts with the 15 raw fields), drawn
+    over the ranges of the render_tab1 form. Categories are cycled so that
+    every value appears at least once when n is large enough.
+    """
+    rng = np.random.default_rng(seed)
+    people = []
+    for i in range(n):
+        person = {
+            "years_in_germany": int(rng.integers(0, 61)),
+            "age": int(rng.integers(18, 101)),
+            "monthly_income_eur": int(rng.integers(0, 10001)),
+            "months_tax_paid_last_12": int(rng.integers(0, 13)),
+            LABEL_FIELD: str(language_classes[i % len(language_classes)]),
+            "nationality": str(nat_categories[i % len(nat_categories)]),
+            "resident_permit_type": str(permit_categories[i % len(permit_categories)]),
+        }
+        for field in NUMERIC_FIELDS:
+            person.setdefault(field, int(rng.integers(0, 2)))
+        people.append(person)
+    return people
+
+
+def check_equivalence(compiled, feature_columns, scaler, label_encoder, onehot_encoder,
+                      n_random=500, atol=1e-6, seed=0):
+    """
+    Compiled paths (transform_one / transform_many / transform_frame) vs
+    the pandas path (build_feature_matrix) on every
+    language/nationality/permit value plus random numeric inputs.
+    Returns the max absolute difference; raises if it is above atol.
+    """
+    nat_categories, permit_categories = onehot_encoder.categories_
+    people = random_people(n_random, label_encoder.classes_, nat_categories, permit_categories, seed)
+
+    expected = build_feature_matrix(
+        pd.DataFrame(people)[RAW_FIELDS], feature_columns, scaler, label_encoder, onehot_encoder
+    )
+    actual = compiled.transform_many(people)
+    single = np.vstack([compiled.transform_one(p).copy() for p in people])
+    framed = compiled.transform_frame(pd.DataFrame(people))
+
+    max_diff = float(max(
+        np.max(np.abs(expected - actual)),
+        np.max(np.abs(expected - single)),
+        np.max(np.abs(expected - framed)),
+    ))
+    if max_diff > atol:
+        raise AssertionError(f"Compiled preprocessing differs: max |diff| = {max_diff:.2e} > {atol:.0e}")
+    return max_diff
+
+
+# python eligibility_features.py -> equivalence check against the pickled artifacts
+if __name__ == "__main__":
+    feature_columns = read_feature_columns()
+    scaler, label_encoder, onehot_encoder = read_preprocessors()
+    compiled = CompiledPreprocessor.from_artifacts(feature_columns, scaler, label_encoder, onehot_encoder)
+    max_diff = check_equivalence(compiled, feature_columns, scaler, label_encoder, onehot_encoder)
+    print(f"Compiled preprocessing matches pandas path: max |diff| = {max_diff:.2e}")
@@ -0,0 +1,66 @@
+# Export the Keras eligibility ANN to a plain NumPy array bundle.
+#
+#   python export_eligibility_weights.py
+#
+# TensorFlow is only needed here (offline: pip install -r requirements-offline.txt).
+# Run pack_eligibility_bundle.py afterwards: the app serves the packed bundle
+# and never imports TF.
+
+import sys
+
+import numpy as np
+from tensorflow.keras.models import load_model
+
+from eligibility_engine import WEIGHTS_FILE, load_engine, save_weights
+
+KERAS_FILE = "models/eligibility_ann.keras"
+
+PARITY_ROWS = 2000
+PARITY_ATOL = 1e-5
+
+
+def extract_dense_layers(model):
+    layers = []
+    for layer in model.layers:
+        if layer.__class__.__name__ == "InputLayer":
+            continue
+        if layer.__class__.__name__ == "Dropout":
+            continue  # no-op at inference time
+        if layer.__class__.__name__ != "Dense":
+            raise ValueError(f"Cannot export layer type: {layer.__class__.__name__}")
+        kernel, bias = layer.get_weights()
+        activation = layer.get_config()["activation"]
+        layers.append((kernel, bias, activation))
+    return layers
+
+
+def check_parity(model, engine, n_rows=PARITY_ROWS, atol=PARITY_ATOL, seed=0):
+    """
+    Compare keras predict vs the NumPy engine on random (already scaled) rows.
+    Returns the max absolute difference; raises if it is above atol.
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0.0, 2.0, size=(n_rows, engine.n_features)).astype(np.float32)
+
+    expected = model.predict(X, verbose=0)
+    actual = engine.predict(X)
+
+    max_diff = float(np.max(np.abs(expected - actual)))
+    if max_diff > atol:
+        raise AssertionError(f"Parity check failed: max |diff| = {max_diff:.2e} > {atol:.0e}")
+    return max_diff
+
+
+if __name__ == "__main__":
+    model = load_model(KERAS_FILE)
+    save_weights(WEIGHTS_FILE, extract_dense_layers(model))
+
+    engine = load_engine(WEIGHTS_FILE)
+    try:
+        max_diff = check_parity(model, engine)
+    except AssertionError as e:
+        print(e)
+        sys.exit(1)
+
+    print(f"Created: {WEIGHTS_FILE} ({len(engine.layers)} dense layers)")
+    print(f"Parity OK on {PARITY_ROWS} rows: max |diff| = {max_diff:.2e}")
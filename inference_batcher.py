@@ -0,0 +1,188 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+
+import numpy as np
+
+DEFAULT_WINDOW_MS = 2.0
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_TIMEOUT_S = 5.0
+
+
+# ============================================================
+# MICRO-BATCHING WORKER
+# ============================================================
+
+class MicroBatcher:
+    """
+    In-process inference worker shared by all Streamlit sessions.
+
+    Session threads submit single feature rows; one worker thread collects
+    whatever arrives within window_ms of the first row (up to
+    max_batch_size), runs predict() once on the stacked batch and hands
+    each caller its own output row through a Future.
+    """
+
+    def __init__(self, predict, window_ms=DEFAULT_WINDOW_MS,
+                 max_batch_size=DEFAULT_MAX_BATCH_SIZE, name="eligibility"):
+        self._predict = predict
+        self.window_ms = window_ms
+        self.max_batch_size = max_batch_size
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+
+        # metrics
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = Counter()
+        self.busy_s = 0.0
+
+        self._thread = threading.Thread(target=self._run, name=f"{name}-batcher", daemon=True)
+        self._thread.start()
+
+    # ---------- client side ----------
+
+    def submit(self, row):
+        """
+        row: one feature vector (copied, so reused buffers are fine).
+        Returns a Future resolving to the model output for that row.
+        """
+        if self._closed:
+            raise RuntimeError(f"{self.name} batcher is closed")
+
+        fut = Future()
+        self._queue.put((np.array(row, dtype=np.float32).reshape(-1), fut))
+
+        depth = self._queue.qsize()
+        with self._lock:
+            self.requests += 1
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+        return fut
+
+    def predict_one(self, row, timeout=DEFAULT_TIMEOUT_S):
+        return self.submit(row).result(timeout=timeout)
+
+    # ---------- worker side ----------
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # rows already queued are taken without waiting
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # let _run see the stop signal
+                break
+            batch.append(item)
+        return batch
+
+    def _run_batch(self, batch):
+        t0 = time.perf_counter()
+        try:
+            out = self._predict(np.stack([row for row, _ in batch]))
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+
+        for i, (_, fut) in enumerate(batch):
+            fut.set_result(out[i])
+
+        with self._lock:
+            self.batches += 1
+            self.batch_sizes[len(batch)] += 1
+            self.busy_s += time.perf_counter() - t0
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._run_batch(self._collect(item))
+
+        # closed: still answer rows submitted before close() (sessions that
+        # held this batcher while it was replaced)
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                leftover.append(item)
+        for i in range(0, len(leftover), self.max_batch_size):
+            self._run_batch(leftover[i:i + self.max_batch_size])
+
+    def close(self, timeout=1.0):
+        """New rows are refused; queued ones are still predicted."""
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    # ---------- metrics ----------
+
+    def stats(self):
+        with self._lock:
+            served = sum(size * n for size, n in self.batch_sizes.items())
+            return {
+                "window_ms": self.window_ms,
+                "max_batch_size": self.max_batch_size,
+                "queue_depth": self._queue.qsize(),
+                "max_queue_depth": self.max_queue_depth,
+                "requests": self.requests,
+                "batches": self.batches,
+                "errors": self.errors,
+                "mean_batch_size": served / self.batches if self.batches else 0.0,
+                "max_batch_size_seen": max(self.batch_sizes, default=0),
+                "batch_size_counts": dict(sorted(self.batch_sizes.items())),
+                "busy_s": self.busy_s,
+            }
+
+
+# ============================================================
+# PROCESS-WIDE INSTANCES
+# ============================================================
+
+_batchers = {}  # name -> (model key, MicroBatcher)
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(name, key, predict, window_ms=DEFAULT_WINDOW_MS,
+                max_batch_size=DEFAULT_MAX_BATCH_SIZE):
+    """
+    One batcher per name, shared by every session. A new key (e.g. a
+    reloaded model bundle) or new settings replace the old batcher.
+    """
+    wanted = (key, window_ms, max_batch_size)
+    current = _batchers.get(name)
+    if current is not None and current[0] == wanted:
+        return current[1]
+
+    with _batchers_lock:
+        current = _batchers.get(name)
+        if current is None or current[0] != wanted:
+            if current is not None:
+                current[1].close()
+            batcher = MicroBatcher(predict, window_ms, max_batch_size, name=name)
+            current = (wanted, batcher)
+            _batchers[name] = current
+    return current[1]
+
+
+def batcher_stats(name):
+    current = _batchers.get(name)
+    return current[1].stats() if current is not None else None
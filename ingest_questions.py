@@ -0,0 +1,233 @@
+# Load a quiz question catalogue into the questions table.
+#
+#   python ingest_questions.py catalogue.csv                      # local SQLite (cache/quiz.sqlite3)
+#   python ingest_questions.py catalogue.csv --backend supabase   # SUPABASE_URL + SUPABASE_SERVICE_KEY
+#   python ingest_questions.py catalogue.jsonl --dry-run          # validate and count only
+#
+# Input: CSV (questions_seed_50.csv layout) or JSON Lines with the columns
+# category, state (empty for general questions), question, option_a..option_d,
+# correct_option (A-D), source_url. The file is streamed; every row is
+# validated, duplicates (same content_hash, see quiz_store.content_hash) are
+# skipped, and only new or changed questions are written, in batches of
+# --batch-size. Running the same file twice writes nothing the second time.
+#
+# Supabase needs the columns state, content_hash (unique) and updated_at on
+# public.questions, and a key that may write (service role). Credentials are
+# read from the environment, else from .streamlit/secrets.toml.
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import tomllib
+
+from quiz_store import (
+    ANSWER_LETTERS,
+    DEFAULT_SQLITE_PATH,
+    OPTION_COLUMNS,
+    QUESTION_COLUMNS,
+    STATES,
+    content_hash,
+    get_question_store,
+)
+
+SECRETS_FILE = ".streamlit/secrets.toml"
+COMPARED_COLUMNS = ("category", "state", "correct_option", "source_url")  # what an update can change
+
+
+class RowError(ValueError):
+    pass
+
+
+# ============================================================
+# READ + VALIDATE
+# ============================================================
+
+def read_rows(path):
+    """
+    -> (line number, raw dict) for a .csv or .jsonl file, one at a time.
+    """
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield line_no, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_no, RowError(f"invalid JSON: {e}")
+        return
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def _text(value):
+    return " ".join(str(value).split()) if value is not None else ""
+
+
+def clean_row(raw):
+    """
+    Raw CSV / JSON row -> questions row (QUESTION_COLUMNS without id).
+    Raises RowError.
+    """
+    if isinstance(raw, Exception):
+        raise raw
+
+    row = {col: _text(raw.get(col)) or None for col in QUESTION_COLUMNS if col not in ("id", "content_hash")}
+    if not row["question"]:
+        raise RowError("question is empty")
+
+    options = [row[col] for col in OPTION_COLUMNS]
+    if not all(options):
+        missing = [col for col in OPTION_COLUMNS if not row[col]]
+        raise RowError(f"needs four options, missing {', '.join(missing)}")
+    if len({option.casefold() for option in options}) < 4:
+        raise RowError("options are not distinct")
+
+    correct = (row["correct_option"] or "").upper()
+    if correct not in ANSWER_LETTERS:
+        raise RowError(f"correct_option must be one of A-D, got {row['correct_option']!r}")
+    row["correct_option"] = correct
+
+    if row["state"] and row["state"] not in STATES:
+        raise RowError(f"unknown state {row['state']!r}")
+
+    row["content_hash"] = content_hash(row)
+    return row
+
+
+# ============================================================
+# BACKENDS
+# ============================================================
+
+def _secret(name):
+    value = os.environ.get(name)
+    if value:
+        return value
+    if os.path.exists(SECRETS_FILE):
+        with open(SECRETS_FILE, "rb") as f:
+            return tomllib.load(f).get(name)
+    return None
+
+
+def open_store(args):
+    """
+    -> the target store; None for a dry run against a SQLite file that does
+    not exist yet (nothing to compare with, and nothing is created).
+    """
+    if args.backend == "sqlite":
+        if args.dry_run:
+            # read-only: no file, table, migration or index is created
+            if not os.path.exists(args.sqlite_path):
+                return None
+            return get_question_store("sqlite", path=args.sqlite_path, seed_csv=None, readonly=True)
+        # no seed: the catalogue being imported is the content
+        return get_question_store("sqlite", path=args.sqlite_path, seed_csv=None)
+
+    url = _secret("SUPABASE_URL")
+    key = _secret("SUPABASE_SERVICE_KEY") or _secret("SUPABASE_ANON_KEY")
+    if not url or not key:
+        raise SystemExit("SUPABASE_URL and SUPABASE_SERVICE_KEY (or SUPABASE_ANON_KEY) are needed for --backend supabase")
+    return get_question_store("supabase", url=url, key=key)
+
+
+def _existing(store):
+    # content_hash -> compared columns, one read of the current catalogue
+    # (rows of a not yet migrated table get their hash computed here)
+    if store is None:
+        return {}
+    return {
+        row.get("content_hash") or content_hash(row): tuple(row.get(col) for col in COMPARED_COLUMNS)
+        for row in store.fetch_questions(limit=None)
+    }
+
+
+# ============================================================
+# INGEST
+# ============================================================
+
+def ingest(path, store, batch_size=500, dry_run=False, show_errors=10):
+    """
+    Streams path into store. Returns the counters of the run.
+    """
+    t0 = time.perf_counter()
+    existing = _existing(store)
+    stats = {
+        "read": 0, "invalid": 0, "duplicates": 0, "unchanged": 0,
+        "new": 0, "updated": 0, "written": 0, "batches": 0,
+    }
+    seen = set()
+    batch = []
+
+    def flush():
+        if batch and not dry_run:
+            store.upsert_questions(batch)
+            stats["written"] += len(batch)
+            stats["batches"] += 1
+        batch.clear()
+
+    for line_no, raw in read_rows(path):
+        stats["read"] += 1
+        try:
+            row = clean_row(raw)
+        except RowError as e:
+            stats["invalid"] += 1
+            if stats["invalid"] <= show_errors:
+                print(f"  line {line_no}: {e}", file=sys.stderr)
+            continue
+
+        key = row["content_hash"]
+        if key in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(key)
+
+        current = existing.get(key)
+        if current == tuple(row[col] for col in COMPARED_COLUMNS):
+            stats["unchanged"] += 1
+            continue
+        stats["new" if current is None else "updated"] += 1
+
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    stats["seconds"] = time.perf_counter() - t0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate and upsert a quiz question catalogue.")
+    parser.add_argument("input", help="catalogue file (.csv or .jsonl)")
+    parser.add_argument("--backend", choices=("sqlite", "supabase"), default="sqlite", help="target (default: sqlite)")
+    parser.add_argument("--sqlite-path", default=DEFAULT_SQLITE_PATH, help=f"SQLite file (default: {DEFAULT_SQLITE_PATH})")
+    parser.add_argument("--batch-size", type=int, default=500, help="rows per upsert (default: 500)")
+    parser.add_argument("--dry-run", action="store_true", help="validate and compare only, write nothing")
+    parser.add_argument("--show-errors", type=int, default=10, help="invalid rows to print (default: 10)")
+    args = parser.parse_args(argv)
+    if args.batch_size <= 0:
+        parser.error("--batch-size must be a positive number")
+
+    store = open_store(args)
+    stats = ingest(args.input, store, args.batch_size, args.dry_run, args.show_errors)
+
+    rate = stats["read"] / stats["seconds"] if stats["seconds"] else 0.0
+    print(
+        f"{'Dry run: ' if args.dry_run else ''}{stats['read']} rows read, {stats['invalid']} invalid, "
+        f"{stats['duplicates']} duplicates, {stats['unchanged']} unchanged, "
+        f"{stats['new']} new, {stats['updated']} updated"
+    )
+    print(
+        f"{stats['written']} rows written in {stats['batches']} batches to {args.backend}, "
+        f"{stats['seconds']:.2f}s ({rate:,.0f} rows/s)"
+    )
+    return 1 if stats["invalid"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
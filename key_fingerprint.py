@@ -0,0 +1,9 @@
+import hashlib
+
+
+def fingerprint(secret):
+    """
+    Short, stable stand-in for an API key in cache keys and signatures,
+    so process-wide dicts never hold keys in plain text.
+    """
+    return hashlib.sha256(secret.encode("utf-8")).hexdigest()[:16]
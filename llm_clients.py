@@ -0,0 +1,124 @@
+import threading
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+# NEW Gemini SDK
+from google import genai
+from google.genai import types
+
+from key_fingerprint import fingerprint
+
+DEFAULT_TIMEOUT_S = 120.0        # whole request; browse answers can take a while
+DEFAULT_CONNECT_TIMEOUT_S = 5.0
+DEFAULT_MAX_CONNECTIONS = 20     # per provider, shared by all sessions
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_MAX_RETRIES = 2
+
+
+# ============================================================
+# POOLED CLIENTS (one per provider, shared by all sessions)
+# ============================================================
+
+class ClientPool:
+    """
+    Keeps one long-lived client per provider so keep-alive connections and
+    TLS sessions survive between chatbot turns.
+
+    The clients are async (AsyncOpenAI, genai.Client(...).aio) and must only
+    be used on the llm_dispatch event loop: httpx async pools are bound to
+    the loop they first ran on.
+
+    A client is rebuilt when its API key or connection settings change
+    (e.g. after secrets.toml was edited). The replaced client is not closed:
+    turns still using it finish normally, its connections are released when
+    it is garbage collected.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}  # provider -> (signature, client)
+
+        self.builds = 0
+        self.reuses = 0
+
+    def _get(self, provider, signature, build):
+        current = self._clients.get(provider)
+        if current is not None and current[0] == signature:
+            with self._lock:
+                self.reuses += 1
+            return current[1]
+
+        with self._lock:
+            current = self._clients.get(provider)
+            if current is None or current[0] != signature:
+                current = (signature, build())
+                self._clients[provider] = current
+                self.builds += 1
+            else:
+                self.reuses += 1
+        return current[1]
+
+    def openai(self, api_key, timeout_s=DEFAULT_TIMEOUT_S, connect_timeout_s=DEFAULT_CONNECT_TIMEOUT_S,
+               max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive=DEFAULT_MAX_KEEPALIVE,
+               max_retries=DEFAULT_MAX_RETRIES):
+        signature = (fingerprint(api_key), timeout_s, connect_timeout_s, max_connections, max_keepalive, max_retries)
+
+        def build():
+            timeout = httpx.Timeout(timeout_s, connect=connect_timeout_s)
+            return AsyncOpenAI(
+                api_key=api_key,
+                timeout=timeout,
+                max_retries=max_retries,
+                # DefaultAsyncHttpxClient keeps the SDK's own defaults (redirects, proxies from env)
+                http_client=DefaultAsyncHttpxClient(
+                    timeout=timeout,
+                    limits=httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_keepalive,
+                    ),
+                ),
+            )
+
+        return self._get("openai", signature, build)
+
+    def gemini(self, api_key, timeout_s=DEFAULT_TIMEOUT_S, connect_timeout_s=DEFAULT_CONNECT_TIMEOUT_S,
+               max_connections=DEFAULT_MAX_CONNECTIONS, max_keepalive=DEFAULT_MAX_KEEPALIVE):
+        signature = (fingerprint(api_key), timeout_s, connect_timeout_s, max_connections, max_keepalive)
+
+        def build():
+            # passing the httpx client also keeps the SDK from switching to aiohttp
+            return genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    timeout=int(timeout_s * 1000),  # milliseconds
+                    httpx_async_client=httpx.AsyncClient(
+                        timeout=httpx.Timeout(timeout_s, connect=connect_timeout_s),
+                        limits=httpx.Limits(
+                            max_connections=max_connections,
+                            max_keepalive_connections=max_keepalive,
+                        ),
+                    ),
+                ),
+            )
+
+        return self._get("gemini", signature, build)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "providers": sorted(self._clients),
+                "builds": self.builds,
+                "reuses": self.reuses,
+            }
+
+
+_pool = ClientPool()
+
+
+def get_client_pool():
+    return _pool
+
+
+def client_pool_stats():
+    return _pool.stats()
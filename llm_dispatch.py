@@ -0,0 +1,375 @@
+import asyncio
+import contextlib
+import queue
+import threading
+import time
+from collections import Counter
+
+from llm_metrics import get_metrics_store
+
+DEFAULT_HEDGE_DELAY_S = 1.5   # start the next candidate if nothing came back by then
+DEFAULT_DEADLINE_S = 90.0     # whole answer, all candidates together
+DEFAULT_MAX_CONCURRENT = 8    # upstream calls per provider, all sessions together
+DEFAULT_MAX_WAITING = 16      # calls allowed to queue for a slot; more -> Busy
+
+
+class DispatchError(Exception):
+    pass
+
+
+class AllCandidatesFailed(DispatchError):
+    def __init__(self, errors):
+        self.errors = errors  # [(label, exception)]
+        label, last = errors[-1] if errors else ("-", None)
+        super().__init__(f"{label}: {last}")
+
+
+class DeadlineExceeded(DispatchError, TimeoutError):
+    pass
+
+
+class StreamInterrupted(DispatchError):
+    """The winning stream failed after some text was already delivered."""
+
+
+class EmptyAnswer(DispatchError):
+    pass
+
+
+class Busy(DispatchError):
+    """A provider's wait queue is full; the call was not sent."""
+
+
+# ============================================================
+# CANDIDATE RUNNERS
+# ============================================================
+#
+# A candidate is (label, factory); factory() returns an async iterator of
+# text chunks (one provider + model). The race decides what "answered"
+# means: the whole text for answer(), the first chunk for stream().
+
+async def _collect(factory):
+    text = "".join([chunk async for chunk in factory() if chunk])
+    if not text.strip():
+        raise EmptyAnswer("empty answer")
+    return text
+
+
+async def _first_chunk(factory):
+    chunks = aiter(factory())
+    try:
+        async for chunk in chunks:
+            if chunk:
+                return chunk, chunks
+    except BaseException:
+        await _close(chunks)  # also on cancellation: releases the HTTP connection
+        raise
+    raise EmptyAnswer("empty answer")
+
+
+async def _close(chunks):
+    aclose = getattr(chunks, "aclose", None)
+    if aclose is not None:
+        try:
+            await aclose()
+        except Exception:
+            pass
+
+
+async def _discard_stream(value):
+    await _close(value[1])
+
+
+# ============================================================
+# PER-PROVIDER CONCURRENCY LIMIT
+# ============================================================
+
+class ConcurrencyLimiter:
+    """
+    At most max_concurrent calls to one provider at a time; up to
+    max_waiting more wait for a slot, anything beyond that fails at once
+    with Busy (in a race, the next candidate then gets its turn).
+
+    Only used on the dispatcher loop, so the counters need no lock.
+    """
+
+    def __init__(self, name, max_concurrent=DEFAULT_MAX_CONCURRENT, max_waiting=DEFAULT_MAX_WAITING):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self._sem = asyncio.Semaphore(max_concurrent)
+
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting_seen = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        if self._sem.locked() and self.waiting >= self.max_waiting:
+            self.rejected += 1
+            raise Busy(f"{self.name} is busy ({self.active} calls running, {self.waiting} waiting)")
+
+        if self._sem.locked():
+            # only calls that actually queue count as waiting
+            self.waiting += 1
+            self.max_waiting_seen = max(self.max_waiting_seen, self.waiting)
+            try:
+                await self._sem.acquire()
+            finally:
+                self.waiting -= 1
+        else:
+            await self._sem.acquire()  # free slot: returns without suspending
+
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._sem.release()
+
+    def stats(self):
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_waiting": self.max_waiting,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_waiting_seen": self.max_waiting_seen,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def limited(limiter, factory):
+    """
+    Candidate factory that holds a limiter slot while its chunks stream.
+    """
+    async def chunks():
+        async with limiter.slot():
+            async for chunk in factory():
+                yield chunk
+    return chunks
+
+
+_limiters = {}  # provider -> ((max_concurrent, max_waiting), ConcurrencyLimiter)
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider, max_concurrent=DEFAULT_MAX_CONCURRENT, max_waiting=DEFAULT_MAX_WAITING):
+    """
+    One limiter per provider; new settings replace it (calls holding a slot
+    of the old one finish normally).
+    """
+    wanted = (max_concurrent, max_waiting)
+    current = _limiters.get(provider)
+    if current is None or current[0] != wanted:
+        with _limiters_lock:
+            current = _limiters.get(provider)
+            if current is None or current[0] != wanted:
+                current = (wanted, ConcurrencyLimiter(provider, max_concurrent, max_waiting))
+                _limiters[provider] = current
+    return current[1]
+
+
+def limiter_stats():
+    return {provider: limiter.stats() for provider, (_, limiter) in list(_limiters.items())}
+
+
+# ============================================================
+# HEDGED DISPATCHER (one event loop thread per process)
+# ============================================================
+
+class Dispatcher:
+    """
+    Runs provider calls on a private asyncio loop shared by all sessions.
+
+    Candidates are tried in order. The next one is started when the
+    running ones have not answered within hedge_delay_s, or right away
+    when they all failed. The first good answer wins and every other
+    request is cancelled; nothing runs past deadline_s.
+
+    With a metrics store (llm_metrics) every race is recorded too.
+    """
+
+    def __init__(self, name="llm-dispatch", metrics=None):
+        self.metrics = metrics
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+        self._lock = threading.Lock()
+
+        # metrics
+        self.races = 0
+        self.hedges = 0       # started because the previous one was slow
+        self.fallbacks = 0    # started because the previous one failed
+        self.failures = 0     # candidate errors (incl. empty answers)
+        self.cancelled = 0    # losers stopped after another candidate won
+        self.timeouts = 0
+        self.wins = Counter()
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    async def _race(self, candidates, run, hedge_delay_s, deadline_s, discard=None):
+        """
+        Returns (label, run(factory) result) of the first candidate that succeeds.
+        """
+        if not candidates:
+            raise AllCandidatesFailed([])
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + deadline_s
+        tasks = {}  # task -> label
+        errors = []
+        remaining = list(candidates)
+        winner = None
+
+        def launch():
+            label, factory = remaining.pop(0)
+            tasks[asyncio.create_task(run(factory))] = label
+
+        self._count(races=1)
+        launch()
+        try:
+            while tasks:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    self._count(timeouts=1)
+                    raise DeadlineExceeded(f"no answer within {deadline_s:g}s")
+                if remaining:
+                    timeout = min(timeout, hedge_delay_s)
+
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+                    label = tasks.pop(task)
+                    if task.exception() is not None:
+                        errors.append((label, task.exception()))
+                        self._count(failures=1)
+                    elif winner is None:
+                        winner = (label, task.result())
+                    elif discard is not None:
+                        await discard(task.result())  # finished in the same tick; too late
+                if winner is not None:
+                    with self._lock:
+                        self.wins[winner[0]] += 1
+                    return winner
+
+                if remaining:
+                    self._count(**({"fallbacks": 1} if done else {"hedges": 1}))
+                    launch()
+
+            raise AllCandidatesFailed(errors)
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_race(
+                    candidates[0][0],
+                    winner[0] if winner is not None else None,
+                    len(candidates) - len(remaining),
+                    loop.time() - started,
+                )
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                self._count(cancelled=len(tasks))
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ---------- blocking API for Streamlit session threads ----------
+
+    def answer(self, candidates, hedge_delay_s=DEFAULT_HEDGE_DELAY_S, deadline_s=DEFAULT_DEADLINE_S):
+        """
+        -> (label, full answer text). Raises DeadlineExceeded / AllCandidatesFailed.
+        """
+        fut = asyncio.run_coroutine_threadsafe(
+            self._race(candidates, _collect, hedge_delay_s, deadline_s), self._loop
+        )
+        try:
+            return fut.result()
+        finally:
+            fut.cancel()  # no-op when finished
+
+    def stream(self, candidates, hedge_delay_s=DEFAULT_HEDGE_DELAY_S, deadline_s=DEFAULT_DEADLINE_S):
+        """
+        Generator of text chunks from the first candidate to start streaming;
+        returns (StopIteration.value) the label of that candidate.
+        Raises DeadlineExceeded / AllCandidatesFailed before the first chunk,
+        StreamInterrupted (or DeadlineExceeded) after it.
+        """
+        out = queue.Queue()
+        fut = asyncio.run_coroutine_threadsafe(
+            self._pump(candidates, out, hedge_delay_s, deadline_s), self._loop
+        )
+        try:
+            while True:
+                kind, value = out.get()
+                if kind == "chunk":
+                    yield value
+                elif kind == "error":
+                    raise value
+                else:
+                    return value
+        finally:
+            fut.cancel()  # reader went away (e.g. the session rerun) -> stop the request
+
+    async def _pump(self, candidates, out, hedge_delay_s, deadline_s):
+        started = time.monotonic()
+        try:
+            label, (first, chunks) = await self._race(
+                candidates, _first_chunk, hedge_delay_s, deadline_s, discard=_discard_stream
+            )
+        except Exception as e:
+            out.put(("error", e))
+            return
+
+        out.put(("chunk", first))
+        try:
+            async with asyncio.timeout(deadline_s - (time.monotonic() - started)):
+                async for chunk in chunks:
+                    if chunk:
+                        out.put(("chunk", chunk))
+        except TimeoutError:
+            self._count(timeouts=1)
+            out.put(("error", DeadlineExceeded(f"{label} did not finish within {deadline_s:g}s")))
+            return
+        except Exception as e:
+            out.put(("error", StreamInterrupted(f"{label}: {e}")))
+            return
+        finally:
+            await _close(chunks)
+        out.put(("end", label))
+
+    # ---------- metrics ----------
+
+    def stats(self):
+        with self._lock:
+            return {
+                "races": self.races,
+                "hedges": self.hedges,
+                "fallbacks": self.fallbacks,
+                "failures": self.failures,
+                "cancelled": self.cancelled,
+                "timeouts": self.timeouts,
+                "wins": dict(self.wins),
+            }
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = Dispatcher(metrics=get_metrics_store())
+    return _dispatcher
+
+
+def dispatch_stats():
+    return _dispatcher.stats() if _dispatcher is not None else None
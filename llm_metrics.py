@@ -0,0 +1,254 @@
+import asyncio
+import atexit
+import json
+import queue
+import threading
+import time
+from collections import Counter, deque, namedtuple
+
+import numpy as np
+
+DEFAULT_WINDOW_S = 3600.0     # summaries cover the last hour
+DEFAULT_MAX_SAMPLES = 2000    # per model
+PERCENTILES = (50, 95, 99)
+EXPORT_BACKLOG = 10000      # records waiting for the JSONL file; more are dropped (and counted)
+
+# USD per 1M tokens (input, output), list prices; web search fees not included
+PRICES_PER_1M = {
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-5": (1.25, 10.00),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-1.5-flash": (0.075, 0.30),
+}
+
+# provider generators yield this (besides text) once the usage is known
+Usage = namedtuple("Usage", "input_tokens output_tokens")
+
+
+def estimate_cost(model, input_tokens, output_tokens):
+    price = PRICES_PER_1M.get(model)
+    if price is None:
+        return None
+    return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+
+def _percentiles(values):
+    if not values:
+        return {f"p{p}": None for p in PERCENTILES}
+    qs = np.percentile(np.asarray(values, dtype=np.float64), PERCENTILES)
+    return {f"p{p}": float(q) for p, q in zip(PERCENTILES, qs)}
+
+
+# ============================================================
+# ROLLING STORE (in-process, optional JSONL export)
+# ============================================================
+
+class MetricsStore:
+    """
+    Last max_samples provider calls per model (and the last races), kept
+    in memory; summaries only look at the last window_s seconds.
+
+    With export_path every record is also appended to that file as one
+    JSON line, for offline analysis. The file is written by a background
+    thread, so a slow disk never holds the lock or the dispatcher's event
+    loop; records still queued at exit are written then.
+    """
+
+    def __init__(self, window_s=DEFAULT_WINDOW_S, max_samples=DEFAULT_MAX_SAMPLES, export_path=None):
+        self.window_s = window_s
+        self.max_samples = max_samples
+        self.export_path = export_path
+
+        self._lock = threading.Lock()
+        self._calls = {}  # label -> deque of call records
+        self._races = deque(maxlen=max_samples)
+
+        self._export_queue = queue.Queue(maxsize=EXPORT_BACKLOG)
+        self._export_thread = None
+        self.export_dropped = 0
+        self.export_errors = 0
+        self.export_last_error = None
+
+    def _export(self, record):
+        # under self._lock: only hands the record to the writer thread
+        if not self.export_path:
+            return
+        try:
+            self._export_queue.put_nowait((self.export_path, record))
+        except queue.Full:
+            self.export_dropped += 1
+            return
+        if self._export_thread is None:
+            self._export_thread = threading.Thread(target=self._export_run, name="llm-metrics-export", daemon=True)
+            self._export_thread.start()
+
+    def _write_export(self, items):
+        # path -> lines, each file opened once per batch and written in one call
+        lines = {}
+        for path, record in items:
+            lines.setdefault(path, []).append(json.dumps(record, ensure_ascii=False) + "\n")
+        for path, batch in lines.items():
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(batch))
+            except OSError as e:
+                self.export_errors += 1
+                self.export_last_error = f"{type(e).__name__}: {e}"
+
+    def _take_export(self, block):
+        items = [self._export_queue.get()] if block else []
+        while True:
+            try:
+                items.append(self._export_queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _export_run(self):
+        while True:
+            self._write_export(self._take_export(block=True))
+
+    def flush_export(self):
+        """Writes the queued records now (in the calling thread)."""
+        self._write_export(self._take_export(block=False))
+
+    def record_call(self, label, model, wall_s, ttft_s, usage, outcome, error=None):
+        """
+        outcome: "ok", "error" or "cancelled" (lost a race / reader went away).
+        """
+        record = {
+            "kind": "call",
+            "ts": time.time(),
+            "label": label,
+            "model": model,
+            "wall_s": wall_s,
+            "ttft_s": ttft_s,
+            "input_tokens": usage.input_tokens if usage else None,
+            "output_tokens": usage.output_tokens if usage else None,
+            "outcome": outcome,
+            "error": error,
+        }
+        with self._lock:
+            calls = self._calls.get(label)
+            if calls is None:
+                calls = self._calls[label] = deque(maxlen=self.max_samples)
+            calls.append(record)
+            self._export(record)
+
+    def record_race(self, first, winner, attempts, decided_s):
+        """
+        One question: the first candidate tried, the one that won (None:
+        nobody did), how many were started and when the race was decided
+        (first text for streams).
+        """
+        record = {
+            "kind": "race",
+            "ts": time.time(),
+            "first": first,
+            "winner": winner,
+            "attempts": attempts,
+            "decided_s": decided_s,
+        }
+        with self._lock:
+            self._races.append(record)
+            self._export(record)
+
+    def summary(self):
+        """
+        {"calls": {label: {...}}, "races": {...}} over the last window_s.
+        Times in ms.
+        """
+        since = time.time() - self.window_s
+        with self._lock:
+            calls = {label: [r for r in rs if r["ts"] >= since] for label, rs in self._calls.items()}
+            races = [r for r in self._races if r["ts"] >= since]
+
+        out = {}
+        for label, rs in sorted(calls.items()):
+            if not rs:
+                continue
+            outcomes = Counter(r["outcome"] for r in rs)
+            ok = [r for r in rs if r["outcome"] == "ok"]
+            with_usage = [r for r in rs if r["input_tokens"] is not None]
+            tokens_in = sum(r["input_tokens"] for r in with_usage)
+            tokens_out = sum(r["output_tokens"] for r in with_usage)
+            out[label] = {
+                "calls": len(rs),
+                "ok": outcomes["ok"],
+                "errors": outcomes["error"],
+                "cancelled": outcomes["cancelled"],
+                "wall_ms": _percentiles([1000 * r["wall_s"] for r in ok]),
+                "ttft_ms": _percentiles([1000 * r["ttft_s"] for r in rs if r["ttft_s"] is not None]),
+                "input_tokens": tokens_in,
+                "output_tokens": tokens_out,
+                "cost_usd": estimate_cost(rs[-1]["model"], tokens_in, tokens_out),
+                "last_error": next((r["error"] for r in reversed(rs) if r["error"]), None),
+            }
+
+        answered = [r for r in races if r["winner"] is not None]
+        race_summary = {
+            "questions": len(races),
+            "unanswered": len(races) - len(answered),
+            "fallbacks": sum(r["winner"] != r["first"] for r in answered),
+            "fallbacks_by_first": dict(Counter(r["first"] for r in answered if r["winner"] != r["first"])),
+            "decided_ms": _percentiles([1000 * r["decided_s"] for r in answered]),
+        }
+        return {"window_s": self.window_s, "calls": out, "races": race_summary}
+
+
+def instrumented(store, label, model, factory):
+    """
+    Candidate factory recording wall time, time to first text, token usage
+    and outcome of one provider call. Usage items are consumed here.
+    """
+    async def chunks():
+        t0 = time.perf_counter()
+        ttft = None
+        usage = None
+        outcome, error = "error", None
+        try:
+            async for item in factory():
+                if isinstance(item, Usage):
+                    usage = item
+                    continue
+                if ttft is None and item:
+                    ttft = time.perf_counter() - t0
+                yield item
+            outcome = "ok"
+        except (asyncio.CancelledError, GeneratorExit):
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            store.record_call(label, model, time.perf_counter() - t0, ttft, usage, outcome, error)
+    return chunks
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_metrics_store(export_path=None):
+    """
+    The process-wide store; export_path (if given) switches the JSONL export.
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = MetricsStore(export_path=export_path)
+    if export_path is not None and _store.export_path != export_path:
+        _store.export_path = export_path or None
+    return _store
+
+
+def metrics_summary():
+    return _store.summary() if _store is not None else None
+
+
+@atexit.register
+def _flush_on_exit():
+    # Streamlit server stopping: write the records the export thread has not reached
+    if _store is not None:
+        _store.flush_export()
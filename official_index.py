@@ -0,0 +1,260 @@
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from datetime import datetime, timezone
+
+import numpy as np
+
+INDEX_PATH = "index/official_index"   # -> .npz (arrays) + .json (vocabulary, passages)
+FORMAT_VERSION = 1
+
+# official sites: the chatbot's browse filter and the crawl of build_official_index.py
+ALLOWED_DOMAINS = [
+    "bamf.de",
+    "bmi.bund.de",
+    "bva.bund.de",
+    "service.berlin.de",
+    "bundesregierung.de",
+]
+
+# links of the "Official information" tab, also the seed pages of the crawl
+OFFICIAL_LINKS = [
+    ("BAMF – Bundesamt für Migration und Flüchtlinge", "https://www.bamf.de"),
+    ("BMI – Bundesministerium des Innern", "https://www.bmi.bund.de"),
+    ("BVA – Bundesverwaltungsamt", "https://www.bva.bund.de"),
+    ("Einbürgerung.de – Information portal", "https://www.einbuergerung.de"),
+    ("Publikationen der Bundesregierung", "https://www.publikationen-bundesregierung.de"),
+    ("Integrationsbeauftragte der Bundesregierung", "https://www.integrationsbeauftragte.de"),
+    ("Handbook Germany", "https://handbookgermany.de"),
+    ("Deutschland.de", "https://www.deutschland.de"),
+    ("Tatsachen über Deutschland", "https://www.tatsachen-ueber-deutschland.de"),
+    ("Service-Portal (example: Berlin)", "https://service.berlin.de"),
+]
+
+K1 = 1.5
+B = 0.75
+PASSAGE_WORDS = 120
+PASSAGE_OVERLAP = 30
+
+
+class OfficialIndexError(ValueError):
+    pass
+
+
+# ============================================================
+# TEXT -> TERMS
+# ============================================================
+
+_WORD = re.compile(r"\w+")
+_FOLD = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_SUFFIXES = ("ungen", "en", "er", "es", "e", "n", "s")
+
+STOPWORDS = frozenset("""
+der die das den dem des ein eine einer eines einem einen und oder aber ist sind war wird werden
+kann koennen muss muessen zu zum zur von vom mit fuer auf im in an am als auch bei nach wie wo
+was wer nicht kein keine sie ich du wir ihr es man sich ob dass wenn ueber unter aus noch nur
+the a an and or but of to in on for is are was be been can could do does did i you my we what
+how when where which who with at by from this that it as if not your our there their
+""".split())
+
+
+def _stem(term):
+    # light suffix stripping: "Einbürgerungen" and "Einbürgerung" share a term
+    for suffix in _SUFFIXES:
+        if term.endswith(suffix) and len(term) - len(suffix) >= 4:
+            return term[: -len(suffix)]
+    return term
+
+
+def tokenize(text):
+    text = unicodedata.normalize("NFKC", text).casefold().translate(_FOLD)
+    return [
+        _stem(t) for t in _WORD.findall(text)
+        if (len(t) > 1 or t.isdigit()) and t not in STOPWORDS
+    ]
+
+
+def split_passages(text, max_words=PASSAGE_WORDS, overlap=PASSAGE_OVERLAP):
+    """
+    Overlapping windows of about max_words words (paragraph breaks are
+    treated as whitespace).
+    """
+    words = text.split()
+    if len(words) <= max_words:
+        return [" ".join(words)] if words else []
+    step = max_words - overlap
+    return [" ".join(words[i:i + max_words]) for i in range(0, len(words) - overlap, step)]
+
+
+# ============================================================
+# BM25 INDEX
+# ============================================================
+
+class OfficialIndex:
+    """
+    BM25 over passages of the official-guidance snapshots.
+
+    The per-(term, passage) BM25 weights are precomputed and stored column
+    by column (CSC: indptr / indices / data), so a query only sums the
+    columns of its own terms: one bincount, no Python loop over passages.
+    """
+
+    def __init__(self, vocab, indptr, indices, data, idf, passages, k1=K1, b=B, metadata=None):
+        self.vocab = list(vocab)
+        self.term_ids = {t: i for i, t in enumerate(self.vocab)}
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.idf = idf
+        self.passages = passages  # [{"url", "title", "text"}]
+        self.k1 = k1
+        self.b = b
+        self.metadata = metadata or {}
+
+        n = len(passages)
+        self.unseen_idf = math.log(1 + (n + 0.5) / 0.5)  # a term found in no passage
+
+    @property
+    def n_passages(self):
+        return len(self.passages)
+
+    @classmethod
+    def build(cls, passages, k1=K1, b=B, metadata=None):
+        """
+        passages: [{"url", "title", "text"}]. The title is indexed with every
+        passage of its page.
+        """
+        counts = [Counter(tokenize(f"{p['title']} {p['text']}")) for p in passages]
+        vocab = sorted({t for c in counts for t in c})
+        term_ids = {t: i for i, t in enumerate(vocab)}
+
+        doc_ids, col_ids, tfs = [], [], []
+        for d, c in enumerate(counts):
+            for t, tf in c.items():
+                doc_ids.append(d)
+                col_ids.append(term_ids[t])
+                tfs.append(tf)
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        col_ids = np.asarray(col_ids, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+
+        n = len(passages)
+        dl = np.array([sum(c.values()) for c in counts], dtype=np.float32)
+        avgdl = float(dl.mean()) if n else 1.0
+        df = np.bincount(col_ids, minlength=len(vocab)).astype(np.float32)
+        idf = np.log1p((n - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        norm = k1 * (1 - b + b * dl[doc_ids] / avgdl)
+        weights = idf[col_ids] * tfs * (k1 + 1) / (tfs + norm)
+
+        order = np.argsort(col_ids, kind="stable")
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df.astype(np.int64), out=indptr[1:])
+
+        metadata = dict(metadata or {})
+        metadata.setdefault("created", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+        return cls(vocab, indptr, doc_ids[order], weights[order].astype(np.float32), idf,
+                   passages, k1, b, metadata)
+
+    def search(self, query, k=4):
+        """
+        -> (hits, confidence). hits: [(score, passage)] best first.
+
+        confidence ~ how much of the query the best passage covers: its score
+        over the score of a passage containing every query term once (unknown
+        terms count with the highest idf), clipped to [0, 1].
+        """
+        terms = set(tokenize(query))
+        if not terms or not self.passages:
+            return [], 0.0
+
+        ids = [self.term_ids[t] for t in terms if t in self.term_ids]
+        expected = float(sum(self.idf[i] for i in ids)) + self.unseen_idf * (len(terms) - len(ids))
+        if not ids:
+            return [], 0.0
+
+        cols = [slice(self.indptr[i], self.indptr[i + 1]) for i in ids]
+        scores = np.bincount(
+            np.concatenate([self.indices[s] for s in cols]),
+            weights=np.concatenate([self.data[s] for s in cols]),
+            minlength=self.n_passages,
+        )
+
+        k = min(k, self.n_passages)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        hits = [(float(scores[i]), self.passages[i]) for i in top if scores[i] > 0]
+        confidence = min(1.0, hits[0][0] / expected) if hits else 0.0
+        return hits, confidence
+
+    # ---------- on-disk format (no pickle) ----------
+
+    def save(self, path=INDEX_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "k1": self.k1,
+            "b": self.b,
+            "metadata": self.metadata,
+            "vocab": self.vocab,
+            "passages": self.passages,
+        }
+        # write both files first, then swap them in
+        tmp_npz, tmp_json = f"{path}.npz.tmp", f"{path}.json.tmp"
+        with open(tmp_npz, "wb") as f:
+            np.savez(f, indptr=self.indptr, indices=self.indices, data=self.data, idf=self.idf)
+        with open(tmp_json, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_npz, f"{path}.npz")
+        os.replace(tmp_json, f"{path}.json")
+
+
+def load_index(path=INDEX_PATH):
+    with open(f"{path}.json", encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise OfficialIndexError(f"{path}.json: unsupported index format {meta.get('format_version')}")
+
+    with np.load(f"{path}.npz", allow_pickle=False) as arrays:
+        indptr, indices, data, idf = (arrays[name] for name in ("indptr", "indices", "data", "idf"))
+
+    if len(indptr) != len(meta["vocab"]) + 1 or len(indices) != len(data) or len(idf) != len(meta["vocab"]):
+        raise OfficialIndexError(f"{path}: arrays do not match the vocabulary")
+    return OfficialIndex(meta["vocab"], indptr, indices, data, idf, meta["passages"],
+                         meta["k1"], meta["b"], meta["metadata"])
+
+
+# ============================================================
+# PROCESS-WIDE CACHE
+# ============================================================
+
+_cache = {}  # path -> (mtimes, OfficialIndex)
+_cache_lock = threading.Lock()
+
+
+def get_index(path=INDEX_PATH):
+    """
+    Loaded once per process and reloaded after the index files change.
+    None when no index has been built.
+    """
+    try:
+        stamp = (os.stat(f"{path}.npz").st_mtime_ns, os.stat(f"{path}.json").st_mtime_ns)
+    except FileNotFoundError:
+        return None
+
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, load_index(path))
+            _cache[path] = cached
+    return cached[1]
@@ -0,0 +1,57 @@
+# Pack the eligibility model into one versioned, checksummed, mmap-able file.
+#
+#   python export_eligibility_weights.py   # .keras -> weights .npz (needs TF)
+#   python pack_eligibility_bundle.py      # .npz + pickles -> eligibility_bundle.bin
+#
+# The app only reads models/eligibility_bundle.bin (see eligibility_bundle.py).
+# The pickles stay in models/ as training outputs and packer inputs; reading
+# them needs scikit-learn (requirements-offline.txt), serving does not.
+
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+from eligibility_bundle import BUNDLE_FILE, load_bundle, write_bundle
+from eligibility_engine import WEIGHTS_FILE, load_engine
+from eligibility_features import check_equivalence, read_feature_columns, read_preprocessors
+
+MODELS_DIR = "models"
+
+
+if __name__ == "__main__":
+    engine = load_engine(WEIGHTS_FILE)
+    feature_columns = read_feature_columns(f"{MODELS_DIR}/eligibility_feature_columns.pkl")
+    scaler, label_encoder, onehot_encoder = read_preprocessors(MODELS_DIR)
+
+    header = write_bundle(
+        BUNDLE_FILE,
+        engine.layers,
+        feature_columns,
+        scaler.mean_,
+        scaler.scale_,
+        label_encoder.classes_,
+        onehot_encoder.categories_,
+        ignore_unknown=(onehot_encoder.handle_unknown != "error"),
+        metadata={
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "source": "models/eligibility_ann.keras",
+        },
+    )
+
+    # Round trip: the bundle must reproduce the pickle + npz path exactly
+    bundle = load_bundle(BUNDLE_FILE)
+    try:
+        pre_diff = check_equivalence(
+            bundle.preprocessor, feature_columns, scaler, label_encoder, onehot_encoder
+        )
+        X = np.random.default_rng(0).normal(size=(1000, engine.n_features)).astype(np.float32)
+        model_diff = float(np.max(np.abs(bundle.engine.predict(X) - engine.predict(X))))
+        if model_diff != 0.0:
+            raise AssertionError(f"Bundle weights differ: max |diff| = {model_diff:.2e}")
+    except AssertionError as e:
+        print(e)
+        sys.exit(1)
+
+    print(f"Created: {BUNDLE_FILE} (format {header['format_version']}, version {bundle.version})")
+    print(f"Preprocessing max |diff| = {pre_diff:.2e}, model max |diff| = {model_diff:.2e}")
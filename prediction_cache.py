@@ -0,0 +1,166 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from eligibility_features import LABEL_FIELD, NUMERIC_FIELDS, ONEHOT_FIELDS
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_CHECK_INTERVAL = 5.0  # seconds between stat() checks of models/
+
+
+# ============================================================
+# ARTIFACT FINGERPRINT
+# ============================================================
+
+def _stat_signature(artifacts_dir):
+    entries = []
+    for name in sorted(os.listdir(artifacts_dir)):
+        path = os.path.join(artifacts_dir, name)
+        if os.path.isfile(path):
+            st_ = os.stat(path)
+            entries.append((name, st_.st_size, st_.st_mtime_ns))
+    return tuple(entries)
+
+
+def artifacts_hash(artifacts_dir="models"):
+    """
+    sha256 over the names + contents of every file in artifacts_dir.
+    """
+    h = hashlib.sha256()
+    for name in sorted(os.listdir(artifacts_dir)):
+        path = os.path.join(artifacts_dir, name)
+        if not os.path.isfile(path):
+            continue
+        h.update(name.encode("utf-8"))
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+# ============================================================
+# LRU PREDICTION CACHE
+# ============================================================
+
+def normalize_person(person):
+    """
+    The 15 raw fields -> hashable key, insensitive to int/float/str
+    spelling differences of the same value.
+    """
+    key = [float(person[field]) for field in NUMERIC_FIELDS]
+    key.append(str(person[LABEL_FIELD]).strip().upper())
+    key.extend(str(person[field]).strip().lower() for field in ONEHOT_FIELDS)
+    return tuple(key)
+
+
+class PredictionCache:
+    """
+    Process-wide bounded LRU: normalized input tuple -> probability.
+
+    Shared by all Streamlit sessions (thread-safe). Entries are dropped
+    automatically when the content hash of the model artifacts changes;
+    the hash is only recomputed when a cheap stat() check sees a change.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, artifacts_dir="models",
+                 check_interval=DEFAULT_CHECK_INTERVAL):
+        self.maxsize = maxsize
+        self.artifacts_dir = artifacts_dir
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        self._signature = _stat_signature(artifacts_dir)
+        self._version = artifacts_hash(artifacts_dir)
+        self._last_check = time.monotonic()
+
+    def version(self):
+        """
+        Content hash of the artifacts. Clears the cache if it changed.
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return self._version
+
+        with self._lock:
+            self._last_check = now
+            signature = _stat_signature(self.artifacts_dir)
+            if signature != self._signature:
+                self._signature = signature
+                new_version = artifacts_hash(self.artifacts_dir)
+                if new_version != self._version:
+                    self._version = new_version
+                    self._data.clear()
+                    self.invalidations += 1
+            return self._version
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, person, compute, model_version=""):
+        """
+        compute(person) -> probability, only called on a miss.
+        model_version separates entries of different served models
+        (e.g. the float32 / float16 / int8 bundles).
+        """
+        self.version()
+        key = (model_version,) + normalize_person(person)
+        value = self.get(key)
+        if value is None:
+            value = compute(person)
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "artifacts_version": self._version[:12],
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_prediction_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PredictionCache()
+    return _cache
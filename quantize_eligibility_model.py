@@ -0,0 +1,113 @@
+# Reduced-precision variants of the eligibility model + accuracy report.
+#
+#   python quantize_eligibility_model.py [--validation-csv applicants.csv]
+#
+# Writes models/eligibility_bundle_float16.bin and _int8.bin next to the
+# float32 bundle and compares their probabilities and 0.5 decisions with
+# float32. Without --validation-csv, synthetic applicants over the ranges
+# of the render_tab1 form are used. The report goes to
+# cache/eligibility_quantization_report.json (not tracked) unless --report is given.
+#
+# Serve a variant by setting ELIGIBILITY_MODEL_PRECISION = "float16" / "int8"
+# in .streamlit/secrets.toml (default: "float32").
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from eligibility_bundle import BUNDLE_FILE, BUNDLE_FILES, load_bundle, write_bundle
+from eligibility_engine import PRECISIONS, quantize_layers
+from eligibility_features import LABEL_FIELD, ONEHOT_FIELDS, RAW_FIELDS, random_people
+
+THRESHOLD = 0.5
+
+
+def _validation_matrix(bundle, validation_csv=None, n_synthetic=20_000):
+    pre = bundle.preprocessor
+    if validation_csv:
+        df = pd.read_csv(validation_csv, usecols=RAW_FIELDS).dropna()
+        df = df[df[LABEL_FIELD].isin(pre.language_classes)]
+        return pre.transform_frame(df), f"{validation_csv} ({len(df)} rows)"
+
+    people = random_people(
+        n_synthetic,
+        pre.language_classes,
+        *(pre.onehot_categories[field] for field in ONEHOT_FIELDS),
+    )
+    return pre.transform_many(people), f"synthetic ({n_synthetic} rows)"
+
+
+def compare(reference_probs, probs, threshold=THRESHOLD):
+    diff = np.abs(probs - reference_probs)
+    flips = int(np.sum((probs >= threshold) != (reference_probs >= threshold)))
+    return {
+        "max_abs_diff": float(diff.max()),
+        "mean_abs_diff": float(diff.mean()),
+        "decision_flips": flips,
+        "decisions_identical": flips == 0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build float16/int8 eligibility bundles and an accuracy report.")
+    parser.add_argument("--validation-csv", help="CSV with the 15 raw fields (default: synthetic applicants)")
+    parser.add_argument("--report", default="cache/eligibility_quantization_report.json", help="where to write the JSON report")
+    args = parser.parse_args(argv)
+
+    base = load_bundle(BUNDLE_FILE)
+    if base.precision != "float32":
+        raise SystemExit(f"{BUNDLE_FILE} must be the float32 bundle (found {base.precision})")
+
+    X, source = _validation_matrix(base, args.validation_csv)
+    reference = base.engine.predict(X)[:, 0]
+
+    report = {"validation_set": source, "threshold": THRESHOLD, "variants": {}}
+    for precision in PRECISIONS:
+        path = BUNDLE_FILES[precision]
+        if precision != "float32":
+            pre = base.preprocessor
+            write_bundle(
+                path,
+                quantize_layers(base.engine.layers, precision),
+                base.feature_columns,
+                pre.mean,
+                pre.scale,
+                pre.language_classes,
+                [pre.onehot_categories[field] for field in ONEHOT_FIELDS],
+                ignore_unknown=pre.ignore_unknown,
+                metadata=dict(base.metadata, quantized_from=base.version),
+            )
+
+        variant = load_bundle(path)
+        probs = variant.engine.predict(X)[:, 0]
+        report["variants"][precision] = {
+            "path": path,
+            "file_bytes": os.path.getsize(path),
+            "weight_bytes": variant.engine.weight_bytes,
+            **compare(reference, probs),
+        }
+
+    identical = [p for p in PRECISIONS if report["variants"][p]["decisions_identical"]]
+    report["recommended"] = min(identical, key=lambda p: report["variants"][p]["weight_bytes"])
+
+    if os.path.dirname(args.report):
+        os.makedirs(os.path.dirname(args.report), exist_ok=True)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"Validation set: {source}")
+    print(f"{'precision':<10}{'weights':>10}{'file':>10}{'max |dp|':>12}{'flips':>8}")
+    for precision, r in report["variants"].items():
+        print(
+            f"{precision:<10}{r['weight_bytes']:>10}{r['file_bytes']:>10}"
+            f"{r['max_abs_diff']:>12.2e}{r['decision_flips']:>8}"
+        )
+    print(f"Smallest variant with identical decisions: {report['recommended']}")
+    print(f"Report: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import threading
+import time
+from types import MappingProxyType
+
+DEFAULT_TTL_S = 300.0     # how long a catalogue is served before its version is checked again
+DEFAULT_PAGE_SIZE = 50    # questions per keyset page
+PREFETCH_AHEAD = 10       # load the next page when a session gets this close to the loaded end
+
+
+# ============================================================
+# PAGED, READ-ONLY CATALOGUE (one copy per process)
+# ============================================================
+
+class QuestionCatalog:
+    """
+    Questions of one catalogue version, shared by every session. Sessions
+    only keep indices into it (their shuffle order).
+
+    Rows are loaded in id order, one keyset page at a time
+    (load_page(after_id, limit) -> rows): the first page before the quiz is
+    shown, the following ones in the background as sessions get close to
+    the loaded end (prefetch). Reading a row that is not loaded yet loads
+    the pages up to it. Loaded rows never change.
+
+    total=None (row count unknown) reads pages until a short one: use
+    load_all() before handing such a catalogue out.
+    """
+
+    def __init__(self, load_page, total, version=None, page_size=DEFAULT_PAGE_SIZE):
+        self.load_page = load_page
+        self.total = total
+        self.version = version
+        self.page_size = page_size
+        self.loaded_at = time.time()
+
+        self._rows = []
+        self._last_id = None
+        self._load_lock = threading.Lock()
+        self._prefetching = False
+
+        # metrics
+        self.pages = 0
+        self.prefetches = 0
+        self.waits = 0          # reads that had to load synchronously
+        self.errors = 0
+        self.last_error = None
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, i):
+        if i >= len(self._rows):
+            self.waits += 1
+            self._load_until(i)
+        return self._rows[i]
+
+    def __iter__(self):
+        for i in range(self.total):
+            yield self[i]
+
+    @property
+    def loaded(self):
+        return len(self._rows)
+
+    @property
+    def complete(self):
+        return self.total is not None and len(self._rows) >= self.total
+
+    def _load_next_page(self):
+        with self._load_lock:
+            if self.complete:
+                return
+            limit = self.page_size if self.total is None else min(self.page_size, self.total - len(self._rows))
+            rows = self.load_page(self._last_id, limit)
+            self._rows.extend(MappingProxyType(dict(row)) for row in rows)
+            if rows:
+                self._last_id = rows[-1]["id"]
+                self.pages += 1
+            if len(rows) < limit:
+                self.total = len(self._rows)  # last page (or rows were deleted since the count)
+
+    def load_all(self):
+        while not self.complete:
+            self._load_next_page()
+
+    def _load_until(self, i):
+        while i >= len(self._rows) and not self.complete:
+            self._load_next_page()
+        if i >= len(self._rows):
+            raise IndexError(i)
+
+    def prefetch(self, index):
+        """
+        Starts loading the pages up to index + PREFETCH_AHEAD in a
+        background thread (at most one at a time per catalogue).
+        """
+        target = min(index + PREFETCH_AHEAD, self.total - 1)
+        if target < len(self._rows) or self._prefetching:
+            return False
+        self._prefetching = True
+        self.prefetches += 1
+
+        def run():
+            try:
+                self._load_until(target)
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"  # the next read retries in the session
+            finally:
+                self._prefetching = False
+
+        threading.Thread(target=run, name="quiz-prefetch", daemon=True).start()
+        return True
+
+
+class CatalogCache:
+    """
+    Serves one QuestionCatalog to all sessions.
+
+    load_version() -> (row count, change marker), e.g. count + max
+    updated_at. After ttl_s it is compared with the cached catalogue's
+    version; a new catalogue is only started when it changed. If the
+    version check fails (or returns None), the whole table is read page by
+    page instead, every ttl_s. One thread checks at a time, the others keep
+    getting the current catalogue meanwhile. If the database is unreachable
+    the old catalogue is kept.
+    """
+
+    def __init__(self, load_page, load_version, ttl_s=DEFAULT_TTL_S, page_size=DEFAULT_PAGE_SIZE):
+        self.load_page = load_page
+        self.load_version = load_version
+        self.ttl_s = ttl_s
+        self.page_size = page_size
+
+        self._catalog = None
+        self._checked_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._lock = threading.Lock()
+
+        # metrics
+        self.hits = 0
+        self.version_checks = 0
+        self.loads = 0
+        self.errors = 0
+        self.last_error = None
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self):
+        catalog = self._catalog
+        if catalog is not None and time.monotonic() - self._checked_at < self.ttl_s:
+            self._count("hits")
+            return catalog
+
+        # the first load waits; later refreshes are done by one session only
+        if not self._refresh_lock.acquire(blocking=catalog is None):
+            self._count("hits")
+            return catalog
+        try:
+            catalog = self._catalog
+            if catalog is not None and time.monotonic() - self._checked_at < self.ttl_s:
+                self._count("hits")
+                return catalog
+            return self._refresh(catalog)
+        finally:
+            self._refresh_lock.release()
+
+    def _refresh(self, catalog):
+        try:
+            version = self._version()
+            if catalog is not None and version is not None and version == catalog.version:
+                self._checked_at = time.monotonic()
+                return catalog
+
+            if version is None:
+                # no row count / change marker: read it all now, reload after ttl_s
+                new = QuestionCatalog(self.load_page, None, None, self.page_size)
+                new.load_all()
+            else:
+                new = QuestionCatalog(self.load_page, version[0], version, self.page_size)
+                new._load_next_page()  # first page now, the rest on demand
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+            if catalog is None:
+                raise
+            self._checked_at = time.monotonic()  # stale catalogue, next try after ttl_s
+            return catalog
+
+        self._count("loads")
+        self._catalog = new
+        self._checked_at = time.monotonic()
+        return new
+
+    def _version(self):
+        self._count("version_checks")
+        try:
+            return self.load_version()
+        except Exception as e:
+            # e.g. no updated_at column: fall back to a full reload every ttl_s
+            with self._lock:
+                self.errors += 1
+                self.last_error = f"version check: {type(e).__name__}: {e}"
+            return None
+
+    def invalidate(self):
+        """Check the version on the next get()."""
+        self._checked_at = 0.0
+
+    def stats(self):
+        catalog = self._catalog
+        with self._lock:
+            out = {
+                "questions": len(catalog) if catalog is not None else 0,
+                "loaded": catalog.loaded if catalog is not None else 0,
+                "pages": catalog.pages if catalog is not None else 0,
+                "prefetches": catalog.prefetches if catalog is not None else 0,
+                "waits": catalog.waits if catalog is not None else 0,
+                "page_size": self.page_size,
+                "version": catalog.version if catalog is not None else None,
+                "loaded_at": catalog.loaded_at if catalog is not None else None,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "version_checks": self.version_checks,
+                "loads": self.loads,
+                "errors": self.errors,
+                "last_error": self.last_error,
+            }
+        if catalog is not None and catalog.last_error:
+            out["last_error"] = catalog.last_error
+        return out
+
+
+_caches = {}  # signature -> CatalogCache
+_caches_lock = threading.Lock()
+
+
+def get_catalog_cache(signature, load_page, load_version, ttl_s=DEFAULT_TTL_S, page_size=DEFAULT_PAGE_SIZE):
+    """
+    One cache per question source (signature, e.g. URL + client); new
+    ttl_s / page_size apply to the existing cache (page_size from its next
+    catalogue on).
+    """
+    cache = _caches.get(signature)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(signature)
+            if cache is None:
+                cache = _caches[signature] = CatalogCache(load_page, load_version, ttl_s, page_size)
+    cache.ttl_s = ttl_s
+    cache.page_size = page_size
+    return cache
+
+
+def catalog_stats():
+    with _caches_lock:
+        caches = list(_caches.values())
+    return caches[-1].stats() if caches else None
@@ -0,0 +1,211 @@
+import atexit
+import threading
+import time
+from collections import deque
+
+from key_fingerprint import fingerprint
+
+DEFAULT_BATCH_SIZE = 50        # rows per insert
+DEFAULT_FLUSH_INTERVAL_S = 2.0  # oldest buffered row waits at most this long
+DEFAULT_MAX_BACKLOG = 5000     # rows kept while the database is unreachable; oldest dropped beyond
+DEFAULT_MAX_ATTEMPTS = 5       # inserts of one batch before it is given up
+RETRY_BACKOFF_S = (1.0, 30.0)  # first / longest wait after a failed insert
+
+
+# ============================================================
+# SHARED SUPABASE CLIENT (one per project, all sessions)
+# ============================================================
+
+_clients = {}  # (url, key fingerprint) -> client
+_clients_lock = threading.Lock()
+
+
+def get_supabase_client(url, key):
+    """
+    One long-lived client per project and key, so its HTTP connections
+    are reused instead of a new client per query.
+    """
+    signature = (url, fingerprint(key))
+    client = _clients.get(signature)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(signature)
+            if client is None:
+                from supabase import create_client  # heavy import, only when the quiz needs it
+                client = _clients[signature] = create_client(url, key)
+    return client
+
+
+# ============================================================
+# WRITE-BEHIND ATTEMPT BUFFER
+# ============================================================
+
+class AttemptWriter:
+    """
+    Buffers quiz attempts from all sessions and inserts them in batches
+    from a background thread: when batch_size rows are waiting, after
+    flush_interval_s, or on flush() (quiz finished, process exit).
+
+    A failed insert is retried with backoff, up to max_attempts per batch.
+    While the database is unreachable at most max_backlog rows are kept;
+    beyond that the oldest are dropped (and counted), so memory stays
+    bounded.
+    """
+
+    def __init__(self, insert_batch, batch_size=DEFAULT_BATCH_SIZE, flush_interval_s=DEFAULT_FLUSH_INTERVAL_S,
+                 max_backlog=DEFAULT_MAX_BACKLOG, max_attempts=DEFAULT_MAX_ATTEMPTS, name="quiz-attempts"):
+        self.insert_batch = insert_batch  # list of row dicts -> None, raises on failure
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_attempts = max_attempts
+
+        self._rows = deque(maxlen=max_backlog)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Condition(self._lock)
+        self._writing = False
+        self._flush_requested = False
+
+        # metrics
+        self.buffered = 0
+        self.written = 0
+        self.batches = 0
+        self.failed_inserts = 0
+        self.dropped = 0        # backlog overflow or given up after max_attempts
+        self.last_error = None
+
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def add(self, row):
+        with self._lock:
+            if len(self._rows) == self._rows.maxlen:
+                self.dropped += 1  # deque drops the oldest row
+            self._rows.append(row)
+            self.buffered += 1
+            full = len(self._rows) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def flush(self, timeout_s=None):
+        """
+        Writes everything buffered now. Without timeout_s it only wakes the
+        writer; with it, waits up to timeout_s and returns True if the
+        buffer was emptied.
+        """
+        with self._lock:
+            self._flush_requested = True
+        self._wake.set()
+        if timeout_s is None:
+            return False
+
+        deadline = time.monotonic() + timeout_s
+        with self._idle:
+            while self._rows or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def _take_batch(self, force):
+        with self._lock:
+            if not self._rows or not (force or len(self._rows) >= self.batch_size):
+                return None
+            n = min(self.batch_size, len(self._rows))
+            self._writing = True
+            return [self._rows.popleft() for _ in range(n)]
+
+    def _write(self, batch):
+        for attempt in range(self.max_attempts):
+            try:
+                self.insert_batch(batch)
+            except Exception as e:
+                with self._lock:
+                    self.failed_inserts += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+                if attempt + 1 < self.max_attempts:
+                    time.sleep(min(RETRY_BACKOFF_S[0] * 2 ** attempt, RETRY_BACKOFF_S[1]))
+                continue
+            with self._lock:
+                self.written += len(batch)
+                self.batches += 1
+            return
+        with self._lock:
+            self.dropped += len(batch)
+
+    def _run(self):
+        while True:
+            triggered = self._wake.wait(self.flush_interval_s)
+            self._wake.clear()
+            with self._lock:
+                force = not triggered or self._flush_requested
+                self._flush_requested = False
+
+            # timer or flush: write everything; size trigger: full batches only
+            while (batch := self._take_batch(force)) is not None:
+                try:
+                    self._write(batch)
+                finally:
+                    with self._lock:
+                        self._writing = False
+                        self._idle.notify_all()
+            with self._lock:
+                self._idle.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": len(self._rows),
+                "max_backlog": self._rows.maxlen,
+                "buffered": self.buffered,
+                "written": self.written,
+                "batches": self.batches,
+                "failed_inserts": self.failed_inserts,
+                "dropped": self.dropped,
+                "last_error": self.last_error,
+            }
+
+
+_writers = {}  # signature -> AttemptWriter
+_writers_lock = threading.Lock()
+
+
+def get_attempt_writer(signature, insert_batch, **settings):
+    """
+    One writer per database (signature: anything identifying the target,
+    e.g. URL + key fingerprint) and settings.
+    A writer replaced after a settings change keeps draining its own rows.
+    """
+    key = (signature, tuple(sorted(settings.items())))
+    writer = _writers.get(key)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(key)
+            if writer is None:
+                writer = _writers[key] = AttemptWriter(insert_batch, **settings)
+    return writer
+
+
+def attempt_writer_stats():
+    with _writers_lock:
+        writers = list(_writers.values())
+    if not writers:
+        return None
+    totals = {}
+    for writer in writers:
+        for name, value in writer.stats().items():
+            if isinstance(value, int):
+                totals[name] = totals.get(name, 0) + value
+            elif value:
+                totals[name] = value
+    return totals
+
+
+@atexit.register
+def _flush_on_exit(timeout_s=10.0):
+    # Streamlit server stopping: write what is still buffered
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.flush(timeout_s)
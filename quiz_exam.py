@@ -0,0 +1,83 @@
+import random
+import threading
+import weakref
+from array import array
+
+# official "Leben in Deutschland" test format
+EXAM_GENERAL = 30      # questions from the general catalogue
+EXAM_STATE = 3         # questions about the applicant's Bundesland
+PASS_MARK = 17         # correct answers needed
+EXAM_MINUTES = 60
+
+
+# ============================================================
+# CATEGORY / STATE INDEX (one per catalogue version)
+# ============================================================
+
+class ExamIndex:
+    """
+    Catalogue positions split into general questions and per-Bundesland
+    questions, built in one pass. A question is state-specific when its
+    state column is set (or, for catalogues without it, its category
+    names a state). Sampling an exam then only touches the 33 picks.
+    """
+
+    def __init__(self, catalog, states=()):
+        by_name = {state.casefold(): state for state in states}
+        general = array("I")
+        by_state = {}
+        for i, row in enumerate(catalog):
+            state = row.get("state") or by_name.get((row.get("category") or "").casefold())
+            if state:
+                by_state.setdefault(state, array("I")).append(i)
+            else:
+                general.append(i)
+        self.general = general
+        self.by_state = by_state
+
+    def state_count(self, state):
+        return len(self.by_state.get(state, ()))
+
+    def sample(self, state, n_general=EXAM_GENERAL, n_state=EXAM_STATE, rng=random):
+        """
+        -> array of catalogue positions: n_general general questions, then
+        n_state about state (fewer if the catalogue does not have enough).
+        """
+        state_pool = self.by_state.get(state, ())
+        picked = rng.sample(self.general, min(n_general, len(self.general)))
+        picked += rng.sample(state_pool, min(n_state, len(state_pool)))
+        return array("I", picked)
+
+
+_indexes = weakref.WeakKeyDictionary()  # catalogue -> ExamIndex
+_indexes_lock = threading.Lock()
+
+
+def get_exam_index(catalog, states=()):
+    """
+    The index of this catalogue, shared by all sessions. Built on first use
+    (which loads the rest of a paged catalogue once); a new catalogue
+    version gets a new index.
+    """
+    index = _indexes.get(catalog)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(catalog)
+            if index is None:
+                index = _indexes[catalog] = ExamIndex(catalog, states)
+    return index
+
+
+def score_exam(catalog, order, answers, n_general=EXAM_GENERAL):
+    """
+    answers: {exam position: letter}; the first n_general positions are the
+    general questions. -> (correct general, correct state, passed)
+    """
+    general = state = 0
+    for pos, i in enumerate(order):
+        if answers.get(pos) == catalog[i]["correct_option"]:
+            if pos < n_general:
+                general += 1
+            else:
+                state += 1
+    return general, state, general + state >= PASS_MARK
@@ -0,0 +1,355 @@
+import csv
+import hashlib
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from datetime import datetime, timezone
+
+from key_fingerprint import fingerprint
+from quiz_db import get_supabase_client
+
+DEFAULT_SQLITE_PATH = "cache/quiz.sqlite3"
+DEFAULT_SEED_CSV = "questions_seed_50.csv"
+
+QUESTION_COLUMNS = (
+    "id", "category", "state", "question", "option_a", "option_b", "option_c", "option_d", "correct_option",
+    "source_url", "content_hash",
+)
+# what the quiz itself reads (no source_url / content_hash)
+QUIZ_COLUMNS = (
+    "id", "category", "state", "question", "option_a", "option_b", "option_c", "option_d", "correct_option",
+)
+ATTEMPT_COLUMNS = ("session_id", "question_id", "selected_option", "is_correct")
+OPTION_COLUMNS = ("option_a", "option_b", "option_c", "option_d")
+ANSWER_LETTERS = ("A", "B", "C", "D")
+
+# values of the state column (state-specific questions of the official catalogue)
+STATES = (
+    "Baden-Württemberg", "Bayern", "Berlin", "Brandenburg", "Bremen", "Hamburg", "Hessen",
+    "Mecklenburg-Vorpommern", "Niedersachsen", "Nordrhein-Westfalen", "Rheinland-Pfalz", "Saarland",
+    "Sachsen", "Sachsen-Anhalt", "Schleswig-Holstein", "Thüringen",
+)
+
+
+def _normalize(text):
+    return " ".join(unicodedata.normalize("NFKC", text or "").casefold().split())
+
+
+def content_hash(row):
+    """
+    Identity of a question: its state (None for general questions), text
+    and the four options as shown. The correct option, category and source
+    are attributes, so correcting them updates the row instead of adding one.
+    """
+    parts = [row.get("state") or "", row["question"], *(row[col] for col in OPTION_COLUMNS)]
+    raw = "\x1f".join(_normalize(part) for part in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ============================================================
+# STORE INTERFACE
+# ============================================================
+
+class QuestionStore:
+    """
+    Where the quiz reads its questions and writes attempts.
+
+    fetch_page(after_id, limit, columns) -> up to limit rows with id > after_id
+                           (None: from the start), ordered by id (keyset pagination)
+    fetch_questions(limit) -> all rows (QUESTION_COLUMNS), page by page
+    catalog_version()      -> (row count, value that changes when the questions do)
+    upsert_questions(rows) -> inserts / updates row dicts by content_hash in one go
+    insert_attempts(rows)  -> inserts row dicts (ATTEMPT_COLUMNS) in one go, raises on failure
+
+    signature identifies the underlying database; caches and the attempt
+    writer are kept per signature.
+    """
+
+    name = "store"
+
+    @property
+    def signature(self):
+        raise NotImplementedError
+
+    def fetch_page(self, after_id=None, limit=100, columns=QUIZ_COLUMNS):
+        raise NotImplementedError
+
+    def fetch_questions(self, limit=None, columns=QUESTION_COLUMNS, page_size=1000):
+        rows, after_id = [], None
+        while limit is None or len(rows) < limit:
+            n = page_size if limit is None else min(page_size, limit - len(rows))
+            page = self.fetch_page(after_id, n, columns)
+            rows.extend(page)
+            if len(page) < n:
+                break
+            after_id = page[-1]["id"]
+        return rows
+
+    def catalog_version(self):
+        raise NotImplementedError
+
+    def upsert_questions(self, rows):
+        raise NotImplementedError
+
+    def insert_attempts(self, rows):
+        raise NotImplementedError
+
+
+# ============================================================
+# SUPABASE (public.questions / public.attempts)
+# ============================================================
+
+class SupabaseStore(QuestionStore):
+    """
+    public.questions needs id, question, option_a..option_d and
+    correct_option (the original schema). Optional columns:
+      category, state  -> "general" / None when missing (mock exam then has no state questions)
+      version_column   -> without it the catalogue version is row count + max id,
+                          so edits of existing rows are only seen after a restart
+      content_hash     -> unique; only needed by ingest_questions.py
+    The columns are read once, from the first row.
+    """
+
+    name = "supabase"
+    OPTIONAL_DEFAULTS = {"category": "general", "state": None}
+
+    def __init__(self, url, key, version_column="updated_at"):
+        self.url = url
+        self.client = get_supabase_client(url, key)  # shared by all sessions
+        self.version_column = version_column
+        self._columns = None
+
+    def _available_columns(self):
+        # None while the table is empty (checked again on the next call)
+        if self._columns is None:
+            data = self.client.table("questions").select("*").limit(1).execute().data
+            if data:
+                self._columns = frozenset(data[0])
+        return self._columns
+
+    @property
+    def signature(self):
+        return ("supabase", self.url, id(self.client))  # pooled clients live as long as the process
+
+    def fetch_page(self, after_id=None, limit=100, columns=QUIZ_COLUMNS):
+        available = self._available_columns()
+        selected = "*" if available is None else ",".join(col for col in columns if col in available)
+        query = self.client.table("questions").select(selected)
+        if after_id is not None:
+            query = query.gt("id", after_id)
+        rows = query.order("id").limit(limit).execute().data or []
+        for row in rows:
+            for col, default in self.OPTIONAL_DEFAULTS.items():
+                if col in columns:
+                    row.setdefault(col, default)
+        return rows
+
+    def catalog_version(self):
+        # row count + newest version_column value (max id without it), one small request;
+        # nulls last: Postgres sorts them first on DESC, one NULL would hide every later edit
+        available = self._available_columns()
+        column = self.version_column if available is None or self.version_column in available else "id"
+        res = (
+            self.client.table("questions")
+            .select(column, count="exact")
+            .order(column, desc=True, nullsfirst=False)
+            .limit(1)
+            .execute()
+        )
+        return res.count, (res.data[0][column] if res.data else None)
+
+    def upsert_questions(self, rows):
+        # needs a unique constraint on public.questions.content_hash;
+        # updated_at is set here so the catalogue version changes
+        now = datetime.now(timezone.utc).isoformat()
+        payload = [{**{k: v for k, v in row.items() if k != "id"}, "updated_at": now} for row in rows]
+        self.client.table("questions").upsert(payload, on_conflict="content_hash").execute()
+        return len(payload)
+
+    def insert_attempts(self, rows):
+        self.client.table("attempts").insert(rows).execute()
+
+
+# ============================================================
+# SQLITE (local file, seeded from a catalogue CSV)
+# ============================================================
+
+def read_catalog_csv(path):
+    """
+    Rows of a catalogue CSV (questions_seed_50.csv layout; id, state and
+    content_hash optional).
+    """
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            row = {col: row.get(col) or None for col in QUESTION_COLUMNS}
+            row["content_hash"] = row["content_hash"] or content_hash(row)
+            yield row
+
+
+class SQLiteStore(QuestionStore):
+    """
+    Questions and attempts in a local SQLite file: no network, reads in
+    microseconds. An empty database is bulk-loaded from seed_csv.
+    Safe to share between threads.
+
+    Files from before the state / content_hash columns are upgraded in place.
+    readonly=True opens an existing file as it is (no schema, migration or
+    seed; missing columns read as None), e.g. for dry runs.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, seed_csv=DEFAULT_SEED_CSV, readonly=False):
+        self.path = path
+        self._lock = threading.Lock()
+        if readonly:
+            uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+            self._conn = sqlite3.connect(uri, uri=True, timeout=5.0, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._columns = self._table_columns()
+            return
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS questions (
+                id             INTEGER PRIMARY KEY,
+                category       TEXT,
+                state          TEXT,
+                question       TEXT NOT NULL,
+                option_a       TEXT NOT NULL,
+                option_b       TEXT NOT NULL,
+                option_c       TEXT NOT NULL,
+                option_d       TEXT NOT NULL,
+                correct_option TEXT NOT NULL CHECK (correct_option IN ('A', 'B', 'C', 'D')),
+                source_url     TEXT,
+                content_hash   TEXT,
+                updated_at     REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS attempts (
+                id              INTEGER PRIMARY KEY,
+                session_id      TEXT NOT NULL,
+                question_id     INTEGER NOT NULL,
+                selected_option TEXT NOT NULL,
+                is_correct      INTEGER NOT NULL,
+                created_at      REAL NOT NULL
+            );
+            """
+        )
+        self._migrate()
+        self._conn.commit()
+        self._columns = self._table_columns()
+
+        if seed_csv and self.count_questions() == 0:
+            self.upsert_questions(read_catalog_csv(seed_csv))
+
+    def _table_columns(self):
+        return {row["name"] for row in self._conn.execute("PRAGMA table_info(questions)")}
+
+    def _migrate(self):
+        columns = self._table_columns()
+        for column in ("state", "content_hash"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE questions ADD COLUMN {column} TEXT")
+        missing = self._conn.execute("SELECT * FROM questions WHERE content_hash IS NULL").fetchall()
+        self._conn.executemany(
+            "UPDATE questions SET content_hash = ? WHERE id = ?",
+            [(content_hash(dict(row)), row["id"]) for row in missing],
+        )
+        self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS questions_content_hash ON questions (content_hash)")
+
+    @property
+    def signature(self):
+        return ("sqlite", os.path.abspath(self.path))
+
+    def count_questions(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def upsert_questions(self, rows):
+        """
+        Inserts new questions and updates changed ones (matched by
+        content_hash) in one transaction; unchanged rows keep their
+        updated_at, so re-running an import does not change the catalogue
+        version. Returns the number of rows inserted or updated.
+        """
+        now = time.time()
+        cols = QUESTION_COLUMNS[1:]
+        values = [(*(row.get(col) for col in cols), now) for row in rows]
+        changed = [col for col in cols if col != "content_hash"]
+        with self._lock:
+            with self._conn:
+                before = self._conn.total_changes
+                self._conn.executemany(
+                    f"INSERT INTO questions ({', '.join(cols)}, updated_at) "
+                    f"VALUES ({', '.join('?' for _ in cols)}, ?) "
+                    f"ON CONFLICT (content_hash) DO UPDATE SET "
+                    f"{', '.join(f'{col} = excluded.{col}' for col in changed)}, updated_at = excluded.updated_at "
+                    f"WHERE {' OR '.join(f'{col} IS NOT excluded.{col}' for col in changed)}",
+                    values,
+                )
+                return self._conn.total_changes - before
+
+    def fetch_page(self, after_id=None, limit=100, columns=QUIZ_COLUMNS):
+        selected = [col for col in columns if col in self._columns]
+        sql = f"SELECT {', '.join(selected)} FROM questions WHERE id > ? ORDER BY id LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(sql, (after_id if after_id is not None else -1, limit)).fetchall()
+        return [{col: row[col] if col in self._columns else None for col in columns} for row in rows]
+
+    def catalog_version(self):
+        with self._lock:
+            count, newest = self._conn.execute("SELECT COUNT(*), MAX(updated_at) FROM questions").fetchone()
+        return count, newest
+
+    def insert_attempts(self, rows):
+        now = time.time()
+        values = [(*(row[col] for col in ATTEMPT_COLUMNS), now) for row in rows]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO attempts ({', '.join(ATTEMPT_COLUMNS)}, created_at) VALUES (?, ?, ?, ?, ?)",
+                    values,
+                )
+
+    def count_attempts(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM attempts").fetchone()[0]
+
+
+# ============================================================
+# SHARED STORES
+# ============================================================
+
+BACKENDS = {"supabase": SupabaseStore, "sqlite": SQLiteStore}
+
+_stores = {}  # (backend, settings) -> store
+_stores_lock = threading.Lock()
+
+
+def get_question_store(backend, **settings):
+    """
+    One store per backend and settings for the whole process, e.g.
+    get_question_store("sqlite", path="cache/quiz.sqlite3").
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown quiz backend {backend!r} (expected one of {sorted(BACKENDS)})")
+    # API keys only as fingerprints
+    key = (backend, tuple(sorted(
+        (name, fingerprint(value) if name == "key" else value)
+        for name, value in settings.items()
+    )))
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = BACKENDS[backend](**settings)
+    return store
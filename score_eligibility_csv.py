@@ -0,0 +1,108 @@
+# Batch eligibility scoring from the command line.
+#
+#   python score_eligibility_csv.py applicants.csv scores.csv --chunk-size 20000
+#
+# The input CSV needs the same 15 raw fields as example_person in
+# render_tab1 (extra columns are passed through). It is streamed in chunks,
+# so memory stays bounded by --chunk-size, not by the file size.
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from eligibility_bundle import BUNDLE_FILE, load_bundle
+from eligibility_features import LABEL_FIELD, NUMERIC_FIELDS, RAW_FIELDS
+
+PROB_COLUMN = "eligibility_probability"
+PRED_COLUMN = "eligible_pred"
+
+
+def _raw_fields(chunk):
+    # non-numeric text in a numeric column ("n/a", "12 years") -> NaN, so the
+    # row is skipped below instead of failing the whole chunk in the encoder
+    raw = chunk[RAW_FIELDS].copy()
+    raw[NUMERIC_FIELDS] = raw[NUMERIC_FIELDS].apply(pd.to_numeric, errors="coerce")
+    return raw
+
+
+def _valid_rows(raw, preprocessor):
+    # unknown language levels cannot be encoded, so filter first
+    # (unknown nationality / permit type are fine: the one-hot encoder ignores them)
+    mask = raw[LABEL_FIELD].isin(preprocessor.language_classes)
+    mask &= raw[NUMERIC_FIELDS].notna().all(axis=1)
+    return mask.to_numpy()
+
+
+def score_chunk(chunk, model, preprocessor, threshold=0.5):
+    """
+    Adds probability + decision columns to one chunk (vectorized).
+    Rows that cannot be encoded get NaN / empty decision.
+    """
+    raw = _raw_fields(chunk)
+    valid = _valid_rows(raw, preprocessor)
+    probs = np.full(len(chunk), np.nan, dtype=np.float32)
+
+    if valid.any():
+        X = preprocessor.transform_frame(raw.loc[valid])
+        probs[valid] = model.predict(X)[:, 0]
+
+    chunk[PROB_COLUMN] = probs
+    chunk[PRED_COLUMN] = pd.Series(probs >= threshold, index=chunk.index).where(valid)
+    return chunk, int((~valid).sum())
+
+
+def score_csv(input_path, output_path, chunk_size=10_000, bundle_path=BUNDLE_FILE, threshold=0.5, log=sys.stderr):
+    bundle = load_bundle(bundle_path)
+
+    reader = pd.read_csv(input_path, chunksize=chunk_size)
+
+    total_rows = 0
+    total_invalid = 0
+    t0 = time.perf_counter()
+
+    for i, chunk in enumerate(reader):
+        missing = [c for c in RAW_FIELDS if c not in chunk.columns]
+        if missing:
+            raise ValueError(f"Input CSV is missing columns: {missing}")
+
+        chunk, n_invalid = score_chunk(chunk, bundle.engine, bundle.preprocessor, threshold)
+        chunk.to_csv(output_path, mode="w" if i == 0 else "a", header=(i == 0), index=False)
+
+        total_rows += len(chunk)
+        total_invalid += n_invalid
+        elapsed = time.perf_counter() - t0
+        print(
+            f"chunk {i + 1}: {total_rows} rows, {total_rows / elapsed:,.0f} rows/sec",
+            file=log,
+        )
+
+    elapsed = time.perf_counter() - t0
+    rate = total_rows / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Done: {total_rows} rows ({total_invalid} not scorable) in {elapsed:.2f}s "
+        f"-> {rate:,.0f} rows/sec. Output: {output_path}",
+        file=log,
+    )
+    return total_rows, total_invalid
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV of applicants with the eligibility ANN.")
+    parser.add_argument("input", help="CSV with the 15 raw applicant fields")
+    parser.add_argument("output", help="CSV to write (input columns + probability + decision)")
+    parser.add_argument("--chunk-size", type=int, default=10_000, help="rows per chunk (default: 10000)")
+    parser.add_argument("--bundle", default=BUNDLE_FILE, help=f"model bundle (default: {BUNDLE_FILE})")
+    parser.add_argument("--threshold", type=float, default=0.5, help="decision threshold (default: 0.5)")
+    args = parser.parse_args(argv)
+
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size must be positive")
+
+    score_csv(args.input, args.output, args.chunk_size, args.bundle, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
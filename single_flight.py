@@ -0,0 +1,121 @@
+import threading
+
+
+# ============================================================
+# SINGLE-FLIGHT STREAMS (identical in-flight questions share one call)
+# ============================================================
+
+class _Flight:
+    """
+    Chunks of one upstream answer, replayed to every session that asked.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+
+    def publish(self, chunk):
+        with self._cond:
+            self.chunks.append(chunk)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self.done = True
+            self.error = error
+            self._cond.notify_all()
+
+    def follow(self):
+        i = 0
+        while True:
+            with self._cond:
+                while i == len(self.chunks) and not self.done:
+                    self._cond.wait()
+                new = self.chunks[i:]
+                i = len(self.chunks)
+                done, error = self.done, self.error
+            yield from new
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """
+    key -> one running producer. The first caller (leader) builds the
+    producer in its own thread; the chunks are pulled by a worker thread so
+    the answer completes even if the leader's browser goes away. Every
+    caller, leader included, reads the same chunks; late joiners get a
+    replay of what already arrived.
+    """
+
+    def __init__(self, name="chat"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = {}
+
+        self.leaders = 0
+        self.coalesced = 0
+
+    def stream(self, key, make_producer):
+        """
+        make_producer() -> iterator of chunks; only called for the leader.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                producer = make_producer()
+            except Exception as e:
+                self._finish(key, flight, e)
+                raise
+            threading.Thread(
+                target=self._run, args=(key, flight, producer), name=f"{self.name}-flight", daemon=True
+            ).start()
+        return flight.follow()
+
+    def _run(self, key, flight, producer):
+        error = None
+        try:
+            for chunk in producer:
+                flight.publish(chunk)
+        except Exception as e:
+            error = e
+        self._finish(key, flight, error)
+
+    def _finish(self, key, flight, error):
+        # unregister first: a question asked after this point starts a new call
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.finish(error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._flights),
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+            }
+
+
+_flights = SingleFlight()
+
+
+def get_single_flight():
+    return _flights
+
+
+def single_flight_stats():
+    return _flights.stats()
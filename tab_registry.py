@@ -0,0 +1,47 @@
+import importlib
+import threading
+import time
+
+# ============================================================
+# TAB REGISTRY
+# ============================================================
+# label -> (module, render function)
+# A tab's module (and its heavy libraries: openai, google-genai,
+# supabase, ...) is imported the first time that tab is rendered.
+
+TABS = {
+    "Eligibility": ("app_tab1_eligibility", "render_tab1"),
+    "Chatbot": ("app_tab4_chatbot", "render_tab4"),
+    "Official info": ("app_tab5_official_info", "render_tab5"),
+    "Learn German": ("app_tab6_learn_german", "render_tab6"),
+    "Quiz": ("app_tab8_quiz", "render_tab8"),
+    "Technical info": ("app_tab7_technical", "render_tab7"),
+}
+
+# label -> seconds spent importing the tab's module (first import in this process)
+IMPORT_TIMES = {}
+
+_lock = threading.Lock()
+_renderers = {}
+
+
+def get_renderer(label):
+    """
+    Return the render function for a tab, importing its module on first use.
+    """
+    render = _renderers.get(label)
+    if render is not None:
+        return render
+
+    module_name, func_name = TABS[label]
+    with _lock:
+        if label not in _renderers:
+            t0 = time.perf_counter()
+            module = importlib.import_module(module_name)
+            IMPORT_TIMES[label] = time.perf_counter() - t0
+            _renderers[label] = getattr(module, func_name)
+    return _renderers[label]
+
+
+def render_tab(label):
+    get_renderer(label)()